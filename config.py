@@ -1,41 +1,84 @@
-import streamlit as st
-
-# Groq API Configuration
-GROQ_API_KEY = st.secrets.get("GROQ_API_KEY")
-
-# Database Configuration
-DB_CONFIG = {
-    "host": st.secrets.get("DB_HOST"),
-    "port": st.secrets.get("DB_PORT"),
-    "database": st.secrets.get("DB_NAME"),
-    "user": st.secrets.get("DB_USER"),
-    "password": st.secrets.get("DB_PASSWORD")
-}
-
-# Image API Base URL
-BASE_URL = st.secrets.get("BASE_URL")
-
-# Validate required secrets
-def validate_secrets():
-    """Validate that all required secrets are configured"""
-    required_secrets = {
-        "GROQ_API_KEY": GROQ_API_KEY,
-        "DB_HOST": DB_CONFIG["host"],
-        "DB_NAME": DB_CONFIG["database"],
-        "DB_USER": DB_CONFIG["user"],
-        "DB_PASSWORD": DB_CONFIG["password"],
-        "BASE_URL": BASE_URL
-    }
-    
-    missing = [key for key, value in required_secrets.items() if not value]
-    
-    if missing:
-        st.error(f"❌ Missing required secrets: {', '.join(missing)}")
-        st.info("Please add these secrets to your .streamlit/secrets.toml file or Streamlit Cloud settings")
-        st.stop()
-
-# Call validation on import (optional - comment out if you want manual control)
-# validate_secrets()
-
-
-
+import streamlit as st
+import functools
+import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+import os
+
+
+def _secret(key):
+    """Read a secret, preferring environment variables so local dev skips st.secrets"""
+    value = os.environ.get(key)
+    if value:
+        return value
+    try:
+        return st.secrets.get(key)
+    except FileNotFoundError:
+        # No secrets.toml at all: env-only setup, unset keys fall back to their defaults
+        return None
+
+# Groq API Configuration
+GROQ_API_KEY = _secret("GROQ_API_KEY")
+
+# Database Configuration
+DB_CONFIG = {
+    "host": _secret("DB_HOST"),
+    "port": _secret("DB_PORT"),
+    "database": _secret("DB_NAME"),
+    "user": _secret("DB_USER"),
+    "password": _secret("DB_PASSWORD")
+}
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """Connection that remembers which server-side prepared statements it holds"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+
+@st.cache_resource
+def get_pool(pid):
+    """Database connection pool, kept alive across Streamlit reruns.
+
+    Keyed on the process id so a forked worker never shares sockets with its parent.
+    """
+    return psycopg2.pool.ThreadedConnectionPool(
+        minconn=int(_secret("DB_POOL_MIN") or 2),
+        maxconn=int(_secret("DB_POOL_MAX") or 20),
+        connection_factory=PooledConnection,
+        **DB_CONFIG
+    )
+
+# Image API Base URL
+BASE_URL = _secret("BASE_URL")
+
+# pgvector HNSW search breadth for image similarity (higher = better recall, slower)
+HNSW_EF_SEARCH = int(_secret("HNSW_EF_SEARCH") or 40)
+
+# Validate required secrets (memoized - the secrets are read once at import)
+@functools.lru_cache(maxsize=1)
+def validate_secrets():
+    """Validate that all required secrets are configured"""
+    required_secrets = {
+        "GROQ_API_KEY": GROQ_API_KEY,
+        "DB_HOST": DB_CONFIG["host"],
+        "DB_NAME": DB_CONFIG["database"],
+        "DB_USER": DB_CONFIG["user"],
+        "DB_PASSWORD": DB_CONFIG["password"],
+        "BASE_URL": BASE_URL
+    }
+    
+    missing = [key for key, value in required_secrets.items() if not value]
+    
+    if missing:
+        st.error(f"❌ Missing required secrets: {', '.join(missing)}")
+        st.info("Please add these secrets to your .streamlit/secrets.toml file or Streamlit Cloud settings")
+        st.stop()
+
+# Call validation on import (optional - comment out if you want manual control)
+# validate_secrets()
+
+
+
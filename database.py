@@ -1,1485 +1,1340 @@
-from psycopg2.extras import RealDictCursor
-from datetime import datetime, timedelta
-from config import DB_CONFIG
-import streamlit as st
-import psycopg2
-import json
-import re
-
-class Database:
-    def __init__(self):
-        # Read database configuration from Streamlit secrets
-        self.config = {
-            "host": st.secrets.get("DB_HOST"),
-            "port": st.secrets.get("DB_PORT"),
-            "database": st.secrets.get("DB_NAME"),
-            "user": st.secrets.get("DB_USER"),
-            "password": st.secrets.get("DB_PASSWORD")
-        }
-        
-        # Validate database configuration
-        if not all([self.config["host"], self.config["database"], 
-                   self.config["user"], self.config["password"]]):
-            st.error("❌ Database configuration incomplete. Please check your secrets.toml file.")
-            st.stop()
-
-    def connect(self):
-        """Create database connection"""
-        try:
-            conn = psycopg2.connect(**self.config)
-            return conn
-        except Exception as e:
-            print(f"Database connection error: {e}")
-            st.error(f"❌ Database connection failed: {str(e)}")
-            return None
-
-
-    # ==================== USER MANAGEMENT ====================
-    
-    def create_user(self, user_data):
-        """Create a new user account"""
-        conn = None
-        cursor = None
-        try:
-            conn = self.connect()
-            cursor = conn.cursor()
-        
-            # Teachers don't need class or parent_id
-            if user_data['role'] == 'teacher':
-                query = """
-                    INSERT INTO user_details (full_name, email, password_hash, role)
-                    VALUES (%s, %s, %s, %s)
-                    RETURNING id
-                """
-                cursor.execute(query, (
-                    user_data['full_name'],
-                    user_data['email'],
-                    user_data['password_hash'],
-                    user_data['role']
-                ))
-            else:
-                # Students need class and possibly parent_id
-                query = """
-                    INSERT INTO user_details (full_name, email, password_hash, role, class, parent_id)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    RETURNING id
-                """
-                cursor.execute(query, (
-                    user_data['full_name'],
-                    user_data['email'],
-                    user_data['password_hash'],
-                    user_data['role'],
-                    user_data.get('class'),
-                    user_data.get('parent_id')
-                ))
-        
-            result = cursor.fetchone()
-        
-            if result is None:
-                raise Exception("Failed to create user - no ID returned")
-        
-            user_id = result[0]
-        
-            # Initialize gamification only for students
-            if user_data['role'] == 'student':
-                cursor.execute("""
-                INSERT INTO student_gamification (student_id)
-                VALUES (%s)
-                ON CONFLICT (student_id) DO NOTHING
-            """, (user_id,))        
-            conn.commit()
-        
-            return True
-        
-        except Exception as e:
-            if conn:
-                conn.rollback()
-            print(f"Error creating user: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
-        
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
-    
-    def get_user_by_email(self, email):
-        """Get user details by email"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            query = "SELECT * FROM user_details WHERE email = %s"
-            cursor.execute(query, (email,))
-            
-            user = cursor.fetchone()
-            
-            cursor.close()
-            conn.close()
-            
-            return dict(user) if user else None
-            
-        except Exception as e:
-            print(f"Error fetching user: {e}")
-            return None
-    
-    # ==================== CURRICULUM MANAGEMENT ====================
-    
-    def save_curriculum(self, class_name, subject, curriculum_text):
-        """Save or update curriculum for a class and subject"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            
-            query = """
-                INSERT INTO curriculum (class, subject, curriculum, updated_at)
-                VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
-                ON CONFLICT (class, subject) 
-                DO UPDATE SET curriculum = EXCLUDED.curriculum, updated_at = CURRENT_TIMESTAMP
-            """
-            
-            cursor.execute(query, (class_name, subject, curriculum_text))
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error saving curriculum: {e}")
-            return False
-    
-    def get_curriculum(self, class_name, subject):
-        """Get curriculum for a specific class and subject"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            
-            query = "SELECT curriculum FROM curriculum WHERE class = %s AND subject = %s"
-            cursor.execute(query, (class_name, subject))
-            
-            result = cursor.fetchone()
-            
-            cursor.close()
-            conn.close()
-            
-            return result[0] if result else None
-            
-        except Exception as e:
-            print(f"Error fetching curriculum: {e}")
-            return None
-    
-    def get_all_subjects_for_class(self, class_name):
-        """Get all subjects that have curriculum for a specific class"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            
-            query = """
-                SELECT DISTINCT subject 
-                FROM curriculum 
-                WHERE class = %s
-                ORDER BY subject
-            """
-            
-            cursor.execute(query, (class_name,))
-            results = cursor.fetchall()
-            
-            subjects = [row[0] for row in results]
-            
-            cursor.close()
-            conn.close()
-            
-            return subjects
-            
-        except Exception as e:
-            print(f"Error fetching subjects: {e}")
-            return []
-    
-    def get_all_curricula(self):
-        """Get all curricula for teacher dashboard"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            query = "SELECT * FROM curriculum ORDER BY class, subject"
-            cursor.execute(query)
-            results = cursor.fetchall()
-            
-            cursor.close()
-            conn.close()
-            
-            return [dict(row) for row in results]
-            
-        except Exception as e:
-            print(f"Error fetching curricula: {e}")
-            return []
-    
-    # ==================== PAPER ANALYSIS ====================
-    
-    def save_paper_analysis(self, class_name, student_id, student_name, subject, student_paper, analysis):
-        """Save paper analysis to database"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            
-            query = """
-                INSERT INTO paper_analysis (class, student_id, student_name, subject, student_paper, analysis_by_model)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                RETURNING id
-            """
-            
-            cursor.execute(query, (class_name, student_id, student_name, subject, student_paper, analysis))
-            
-            analysis_id = cursor.fetchone()[0]
-            
-            # Award points for paper submission
-            self.add_points(student_id, 10, "Paper Analysis Completed")
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-            return analysis_id
-            
-        except Exception as e:
-            print(f"Error saving paper analysis: {e}")
-            return None
-    
-    def get_student_analysis_history(self, student_id):
-        """Get all paper analyses for a student"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            query = """
-                SELECT * FROM paper_analysis 
-                WHERE student_id = %s 
-                ORDER BY created_at DESC
-            """
-            
-            cursor.execute(query, (student_id,))
-            results = cursor.fetchall()
-            
-            cursor.close()
-            conn.close()
-            
-            return [dict(row) for row in results]
-            
-        except Exception as e:
-            print(f"Error fetching analysis history: {e}")
-            return []
-    
-    # ==================== WEAK TOPICS MANAGEMENT ====================
-    
-    def get_weak_topics_history(self, student_id):
-        """Extract weak areas from past paper analyses for a student"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            
-            query = """
-                SELECT id, subject, analysis_by_model, created_at
-                FROM paper_analysis
-                WHERE student_id = %s
-                ORDER BY created_at DESC
-            """
-            
-            cursor.execute(query, (student_id,))
-            results = cursor.fetchall()
-            
-            weak_topics = []
-            
-            for row in results:
-                analysis_id, subject, analysis_text, created_at = row
-                
-                if analysis_text:
-                    weak_areas = self._extract_weak_areas_from_analysis(analysis_text)
-                    
-                    for weak_area in weak_areas:
-                        weak_topics.append({
-                            'analysis_id': analysis_id,
-                            'subject': subject,
-                            'weak_area': weak_area,
-                            'created_at': created_at
-                        })
-            
-            cursor.close()
-            conn.close()
-            
-            return weak_topics
-            
-        except Exception as e:
-            print(f"Error fetching weak topics: {e}")
-            return []
-    
-    def _extract_weak_areas_from_analysis(self, analysis_text):
-        """
-        Enhanced helper method to extract weak areas from analysis text.
-        Now optimized for curriculum-based topic names without explanations.
-        """
-        weak_areas = []
-        
-        # Find the "AREAS FOR IMPROVEMENT" section
-        match = re.search(
-            r"AREAS?\s+FOR\s+IMPROVEMENT[:\-–]*\s*([\s\S]*?)(?=\d+\.\s+[A-Z]|\Z)",
-            analysis_text,
-            re.IGNORECASE
-        )
-        
-        if not match:
-            return weak_areas
-        
-        weak_section = match.group(1).strip()
-        
-        if not weak_section:
-            return weak_areas
-        
-        # Split by lines
-        lines = weak_section.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            
-            # Skip empty lines or lines with only asterisks/bullets
-            if not line or re.match(r'^[\*•\-]+$', line):
-                continue
-            
-            # Stop at encouragement text
-            if line.startswith("You're") or re.search(r'[A-Z][a-z]+.*!$', line):
-                break
-            
-            # Stop at table markup
-            if line.startswith('|'):
-                break
-            
-            # Stop at numbered recommendations
-            if re.match(r'^\d+[\.)]\s+[A-Z]', line):
-                break
-            
-            # Remove bullet markers
-            cleaned_line = re.sub(r'^[•\-*]\s*', '', line).strip()
-            
-            # Only add if it's a reasonable topic name (not empty after cleaning)
-            if cleaned_line and len(cleaned_line) < 100:
-                weak_areas.append(cleaned_line)
-        
-        return weak_areas
-    
-    def save_learned_topic(self, student_id, class_name, subject, topic, content):
-        """Save learned topic for a student"""
-        print(f"🔍 DEBUG: Attempting to save - student_id={student_id}, class={class_name}, subject={subject}, topic={topic}")
-        print(f"🔍 DEBUG: Content length: {len(content) if content else 0}")
-    
-        try:
-            conn = self.connect()
-            cursor = conn.cursor()
-        
-            print(f"🔍 DEBUG: Connection established, executing INSERT...")
-        
-            cursor.execute("""
-                INSERT INTO learned_topics (student_id, class, subject, topic, learned_content)
-                VALUES (%s, %s, %s, %s, %s)
-                ON CONFLICT (student_id, subject, topic)
-                DO UPDATE SET learned_content = EXCLUDED.learned_content,
-                            created_at = CURRENT_TIMESTAMP;
-            """, (student_id, class_name, subject, topic, content))
-        
-            print(f"🔍 DEBUG: Query executed, rows affected: {cursor.rowcount}")
-        
-            conn.commit()
-            print("🔍 DEBUG: Commit successful")
-        
-            cursor.close()
-            conn.close()
-            print("✅ Learned topic saved successfully.")
-            return True
-        except Exception as e:
-            print(f"❌ Error saving learned topic: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
-
-    def get_learned_topics(self, student_id, class_name):
-        """Get topics learned by the student for a specific class"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-            cursor.execute("""
-                SELECT topic, learned_content, created_at, subject, class
-                FROM learned_topics
-                WHERE student_id = %s AND class = %s
-                ORDER BY created_at DESC
-            """, (student_id, class_name))
-
-            results = cursor.fetchall()
-
-            cursor.close()
-            conn.close()
-
-            return [dict(row) for row in results]
-
-        except Exception as e:
-            print(f"Error fetching learned topics: {e}")
-            return []
-
-    
-    # ==================== STUDENT PROGRESS TRACKING ====================
-    
-    def save_practice_result(self, student_id, subject, topic, question, answer, feedback):
-        """Save student's practice question result and update progress tracking"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            
-            # ✅ IMPROVED DETECTION - Same logic as evaluate_answer
-            feedback_lower = feedback.lower().strip()
-            
-            # Check for explicit markers at the beginning
-            if feedback_lower.startswith("correct"):
-                is_correct = True
-            elif feedback_lower.startswith("partially"):
-                is_correct = False
-            elif feedback_lower.startswith("incorrect") or feedback_lower.startswith("wrong"):
-                is_correct = False
-            else:
-                # Fallback with word boundaries
-                import re
-                if re.search(r'\b(incorrect|wrong|not correct|not right)\b', feedback_lower):
-                    is_correct = False
-                elif re.search(r'\b(^correct|right|well done|excellent|perfect|great job)\b', feedback_lower):
-                    is_correct = True
-                else:
-                    is_correct = False
-            
-            cursor.execute("""
-                SELECT id, attempts, correct_attempts
-                FROM student_progress
-                WHERE student_id = %s AND subject = %s AND topic = %s
-            """, (student_id, subject, topic))
-            
-            result = cursor.fetchone()
-            
-            if result:
-                progress_id, attempts, correct_attempts = result
-                new_attempts = attempts + 1
-                new_correct = correct_attempts + (1 if is_correct else 0)
-                
-                cursor.execute("""
-                    UPDATE student_progress
-                    SET attempts = %s, 
-                        correct_attempts = %s,
-                        last_feedback = %s,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE id = %s
-                """, (new_attempts, new_correct, feedback, progress_id))
-            else:
-                cursor.execute("SELECT class FROM user_details WHERE id = %s", (student_id,))
-                class_result = cursor.fetchone()
-                student_class = class_result[0] if class_result else 'Unknown'
-                
-                cursor.execute("""
-                    INSERT INTO student_progress (student_id, class, subject, topic, attempts, correct_attempts, last_feedback)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """, (student_id, student_class, subject, topic, 1, (1 if is_correct else 0), feedback))
-            
-            # Award points for practicing
-            points = 5 if is_correct else 2
-            self.add_points(student_id, points, f"Practice: {topic}")
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error saving practice result: {e}")
-            return False
-        
-    def get_student_progress(self, student_id, subject=None):
-        """Get student's practice progress"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            if subject:
-                query = """
-                    SELECT * FROM student_progress 
-                    WHERE student_id = %s AND subject = %s
-                    ORDER BY updated_at DESC
-                """
-                cursor.execute(query, (student_id, subject))
-            else:
-                query = """
-                    SELECT * FROM student_progress 
-                    WHERE student_id = %s
-                    ORDER BY updated_at DESC
-                """
-                cursor.execute(query, (student_id,))
-            
-            results = cursor.fetchall()
-            
-            cursor.close()
-            conn.close()
-            
-            return [dict(row) for row in results]
-            
-        except Exception as e:
-            print(f"Error fetching student progress: {e}")
-            return []
-
-    # Add these methods to the Database class in database.py
-
-    def get_students_in_class(self, class_name):
-        """Get all students in a specific class"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            cursor.execute("""
-                SELECT id, full_name, email
-                FROM user_details
-                WHERE role = 'student' AND class = %s
-                ORDER BY full_name
-            """, (class_name,))
-            
-            results = cursor.fetchall()
-            
-            cursor.close()
-            conn.close()
-            
-            return [dict(row) for row in results]
-            
-        except Exception as e:
-            print(f"Error fetching students: {e}")
-            return []
-
-    def get_student_paper_reports(self, student_id):
-        """Get summary of all paper analyses for a student"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            cursor.execute("""
-                SELECT 
-                    id,
-                    subject,
-                    created_at,
-                    analysis_by_model
-                FROM paper_analysis
-                WHERE student_id = %s
-                ORDER BY created_at DESC
-            """, (student_id,))
-            
-            results = cursor.fetchall()
-            
-            # Extract marks and percentages from analysis
-            paper_reports = []
-            for row in results:
-                analysis = row['analysis_by_model']
-                
-                # Try to extract marks from analysis text
-                marks_match = re.search(r'(\d+)\s*(?:out of|/)\s*(\d+)', analysis, re.IGNORECASE)
-                percentage_match = re.search(r'(\d+(?:\.\d+)?)\s*%', analysis)
-                
-                obtained_marks = marks_match.group(1) if marks_match else "N/A"
-                total_marks = marks_match.group(2) if marks_match else "N/A"
-                percentage = percentage_match.group(1) if percentage_match else "N/A"
-                
-                paper_reports.append({
-                    'id': row['id'],
-                    'subject': row['subject'],
-                    'date': row['created_at'].strftime('%Y-%m-%d'),
-                    'obtained_marks': obtained_marks,
-                    'total_marks': total_marks,
-                    'percentage': percentage
-                })
-            
-            cursor.close()
-            conn.close()
-            
-            return paper_reports
-            
-        except Exception as e:
-            print(f"Error fetching paper reports: {e}")
-            return []
-
-    def get_student_quiz_summary(self, student_id):
-        """Get summary of all quiz attempts for a student"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            cursor.execute("""
-                SELECT 
-                    qa.id,
-                    q.title,
-                    q.subject,
-                    qa.score,
-                    qa.total_marks,
-                    qa.submitted_at,
-                    qa.time_taken
-                FROM quiz_attempts qa
-                JOIN quizzes q ON qa.quiz_id = q.id
-                WHERE qa.student_id = %s AND qa.score IS NOT NULL
-                ORDER BY qa.submitted_at DESC
-            """, (student_id,))
-            
-            results = cursor.fetchall()
-            
-            quiz_summary = []
-            for row in results:
-                percentage = round((row['score'] / row['total_marks']) * 100, 1) if row['total_marks'] > 0 else 0
-                
-                quiz_summary.append({
-                    'id': row['id'],
-                    'title': row['title'],
-                    'subject': row['subject'],
-                    'obtained_marks': row['score'],
-                    'total_marks': row['total_marks'],
-                    'percentage': percentage,
-                    'date': row['submitted_at'].strftime('%Y-%m-%d'),
-                    'time_taken': f"{row['time_taken'] // 60}m {row['time_taken'] % 60}s"
-                })
-            
-            cursor.close()
-            conn.close()
-            
-            return quiz_summary
-            
-        except Exception as e:
-            print(f"Error fetching quiz summary: {e}")
-            return []
-
-    def get_student_weak_topics_with_progress(self, student_id):
-        """Get weak topics and practice progress for each"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            # Get weak topics from paper analysis
-            weak_topics = self.get_weak_topics_history(student_id)
-            
-            # Get progress for each weak topic
-            topics_with_progress = []
-            seen_topics = set()
-            
-            for topic_data in weak_topics:
-                topic = topic_data['weak_area']
-                subject = topic_data['subject']
-                
-                # Skip duplicates
-                topic_key = f"{subject}:{topic}"
-                if topic_key in seen_topics:
-                    continue
-                seen_topics.add(topic_key)
-                
-                # Get practice progress for this topic
-                cursor.execute("""
-                    SELECT 
-                        attempts,
-                        correct_attempts,
-                        last_feedback,
-                        updated_at
-                    FROM student_progress
-                    WHERE student_id = %s AND subject = %s AND topic = %s
-                """, (student_id, subject, topic))
-                
-                progress = cursor.fetchone()
-                
-                if progress:
-                    accuracy = round((progress['correct_attempts'] / progress['attempts']) * 100, 1) if progress['attempts'] > 0 else 0
-                    
-                    topics_with_progress.append({
-                        'subject': subject,
-                        'topic': topic,
-                        'attempts': progress['attempts'],
-                        'correct_attempts': progress['correct_attempts'],
-                        'accuracy': accuracy,
-                        'last_practiced': progress['updated_at'].strftime('%Y-%m-%d'),
-                        'status': 'Improving' if accuracy >= 70 else 'Needs Practice'
-                    })
-                else:
-                    topics_with_progress.append({
-                        'subject': subject,
-                        'topic': topic,
-                        'attempts': 0,
-                        'correct_attempts': 0,
-                        'accuracy': 0,
-                        'last_practiced': 'Never',
-                        'status': 'Not Started'
-                    })
-            
-            cursor.close()
-            conn.close()
-            
-            return topics_with_progress
-            
-        except Exception as e:
-            print(f"Error fetching weak topics with progress: {e}")
-            return []
-
-
-    def _initialize_gamification(self, student_id):
-        """Initialize gamification record for a student (if missing)"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor()
-        
-            cursor.execute("""
-                INSERT INTO student_gamification (student_id)
-                VALUES (%s)
-                ON CONFLICT (student_id) DO NOTHING
-            """, (student_id,))
-        
-            conn.commit()
-            cursor.close()
-            conn.close()
-        
-            return True
-        except Exception as e:
-            print(f"Error initializing gamification: {e}")
-            return False
-    # ==================== GAMIFICATION ====================
-    
-    def add_points(self, student_id, points, reason):
-        """Add points to student and check for badges"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            
-            # Update streak
-            cursor.execute("""
-                SELECT last_activity_date, current_streak, longest_streak
-                FROM student_gamification
-                WHERE student_id = %s
-            """, (student_id,))
-            
-            result = cursor.fetchone()
-            if result:
-                last_date, current_streak, longest_streak = result
-                today = datetime.now().date()
-                
-                if last_date:
-                    days_diff = (today - last_date).days
-                    if days_diff == 1:
-                        current_streak += 1
-                    elif days_diff > 1:
-                        current_streak = 1
-                else:
-                    current_streak = 1
-                
-                longest_streak = max(longest_streak, current_streak)
-                
-                cursor.execute("""
-                    UPDATE student_gamification
-                    SET total_points = total_points + %s,
-                        current_streak = %s,
-                        longest_streak = %s,
-                        last_activity_date = %s,
-                        level = FLOOR((total_points + %s) / 100) + 1,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE student_id = %s
-                """, (points, current_streak, longest_streak, today, points, student_id))
-                
-                # Check for badge achievements
-                self._check_and_award_badges(cursor, student_id, points, current_streak)
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error adding points: {e}")
-            return False
-    
-    def _check_and_award_badges(self, cursor, student_id, new_points, current_streak):
-        """Check and award badges based on achievements"""
-        try:
-            # Get current stats
-            cursor.execute("""
-                SELECT total_points, level FROM student_gamification
-                WHERE student_id = %s
-            """, (student_id,))
-            
-            result = cursor.fetchone()
-            if not result:
-                return
-            
-            total_points, level = result
-            
-            badges_to_award = []
-            
-            # Point-based badges
-            if total_points >= 100 and not self._has_badge(cursor, student_id, "Century"):
-                badges_to_award.append(("Century", "Earned 100 points", "🏆"))
-            
-            if total_points >= 500 and not self._has_badge(cursor, student_id, "Champion"):
-                badges_to_award.append(("Champion", "Earned 500 points", "🏅"))
-            
-            if total_points >= 1000 and not self._has_badge(cursor, student_id, "Legend"):
-                badges_to_award.append(("Legend", "Earned 1000 points", "👑"))
-            
-            # Streak-based badges
-            if current_streak >= 7 and not self._has_badge(cursor, student_id, "Week Warrior"):
-                badges_to_award.append(("Week Warrior", "7-day learning streak", "🔥"))
-            
-            if current_streak >= 30 and not self._has_badge(cursor, student_id, "Month Master"):
-                badges_to_award.append(("Month Master", "30-day learning streak", "⭐"))
-            
-            # Level-based badges
-            if level >= 5 and not self._has_badge(cursor, student_id, "Rising Star"):
-                badges_to_award.append(("Rising Star", "Reached Level 5", "🌟"))
-            
-            if level >= 10 and not self._has_badge(cursor, student_id, "Superstar"):
-                badges_to_award.append(("Superstar", "Reached Level 10", "💫"))
-            
-            # Award badges
-            for badge_name, description, icon in badges_to_award:
-                cursor.execute("""
-                    INSERT INTO badges (student_id, badge_name, badge_description, badge_icon)
-                    VALUES (%s, %s, %s, %s)
-                """, (student_id, badge_name, description, icon))
-                
-                # Create notification
-                cursor.execute("""
-                    INSERT INTO notifications (user_id, title, message, notification_type)
-                    VALUES (%s, %s, %s, %s)
-                """, (student_id, "New Badge Earned!", f"Congratulations! You earned the '{badge_name}' badge: {description}", "achievement"))
-            
-        except Exception as e:
-            print(f"Error checking badges: {e}")
-    
-    def _has_badge(self, cursor, student_id, badge_name):
-        """Check if student already has a badge"""
-        cursor.execute("""
-            SELECT id FROM badges
-            WHERE student_id = %s AND badge_name = %s
-        """, (student_id, badge_name))
-        return cursor.fetchone() is not None
-    
-    def get_student_gamification(self, student_id):
-        """Get student's gamification stats"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            cursor.execute("""
-                SELECT * FROM student_gamification
-                WHERE student_id = %s
-            """, (student_id,))
-            
-            result = cursor.fetchone()
-            
-            cursor.close()
-            conn.close()
-            
-            return dict(result) if result else None
-            
-        except Exception as e:
-            print(f"Error fetching gamification: {e}")
-            return None
-    
-    def get_student_badges(self, student_id):
-        """Get all badges earned by student"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            cursor.execute("""
-                SELECT * FROM badges
-                WHERE student_id = %s
-                ORDER BY earned_at DESC
-            """, (student_id,))
-            
-            results = cursor.fetchall()
-            
-            cursor.close()
-            conn.close()
-            
-            return [dict(row) for row in results]
-            
-        except Exception as e:
-            print(f"Error fetching badges: {e}")
-            return []
-    
-    # ==================== QUIZ MANAGEMENT ====================
-    
-    def create_quiz(self, teacher_id, class_name, subject, title, duration_minutes, total_marks, deadline, questions):
-        """Create a new quiz with questions"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            
-            # Insert quiz
-            cursor.execute("""
-                INSERT INTO quizzes (teacher_id, class, subject, title, duration_minutes, total_marks, deadline)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                RETURNING id
-            """, (teacher_id, class_name, subject, title, duration_minutes, total_marks, deadline))
-            
-            quiz_id = cursor.fetchone()[0]
-            
-            # Insert questions
-            for i, q in enumerate(questions, 1):
-                cursor.execute("""
-                    INSERT INTO quiz_questions (quiz_id, question_text, question_type, options, correct_answer, marks, order_num)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """, (quiz_id, q['question'], q['type'], json.dumps(q.get('options')), q['answer'], q['marks'], i))
-            
-            # Notify students
-            cursor.execute("""
-                SELECT id FROM user_details
-                WHERE role = 'student' AND class = %s
-            """, (class_name,))
-            
-            students = cursor.fetchall()
-            for student in students:
-                cursor.execute("""
-                    INSERT INTO notifications (user_id, title, message, notification_type)
-                    VALUES (%s, %s, %s, %s)
-                """, (student[0], "New Quiz Available", f"Quiz '{title}' for {subject} is now available!", "quiz"))
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-            return quiz_id
-            
-        except Exception as e:
-            print(f"Error creating quiz: {e}")
-            return None
-    
-    def get_quizzes_for_class(self, class_name, subject=None):
-        """Get all quizzes for a class"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            if subject:
-                cursor.execute("""
-                    SELECT q.*, u.full_name as teacher_name
-                    FROM quizzes q
-                    JOIN user_details u ON q.teacher_id = u.id
-                    WHERE q.class = %s AND q.subject = %s
-                    ORDER BY q.created_at DESC
-                """, (class_name, subject))
-            else:
-                cursor.execute("""
-                    SELECT q.*, u.full_name as teacher_name
-                    FROM quizzes q
-                    JOIN user_details u ON q.teacher_id = u.id
-                    WHERE q.class = %s
-                    ORDER BY q.created_at DESC
-                """, (class_name,))
-            
-            results = cursor.fetchall()
-            
-            cursor.close()
-            conn.close()
-            
-            return [dict(row) for row in results]
-            
-        except Exception as e:
-            print(f"Error fetching quizzes: {e}")
-            return []
-    
-    
-    
-    def get_quiz_questions(self, quiz_id):
-        """Get all questions for a quiz"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-            cursor.execute("""
-                SELECT * FROM quiz_questions
-                WHERE quiz_id = %s
-                ORDER BY order_num
-            """, (quiz_id,))
-        
-            results = cursor.fetchall()
-        
-            # Parse JSON options if they exist
-            questions = []
-            for row in results:
-                q = dict(row)
-                if q['options'] and isinstance(q['options'], str):
-                    import json
-                    try:
-                        q['options'] = json.loads(q['options'])
-                    except:
-                        q['options'] = []
-                questions.append(q)
-        
-            cursor.close()
-            conn.close()
-        
-            return questions
-        
-        except Exception as e:
-            print(f"Error fetching quiz questions: {e}")
-            return []
-    
-    def submit_quiz_attempt(self, quiz_id, student_id, answers, time_taken):
-        """Submit a quiz attempt"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            
-            # Get quiz details
-            cursor.execute("SELECT total_marks FROM quizzes WHERE id = %s", (quiz_id,))
-            total_marks = cursor.fetchone()[0]
-            
-            # Insert attempt
-            cursor.execute("""
-                INSERT INTO quiz_attempts (quiz_id, student_id, answers, time_taken, total_marks)
-                VALUES (%s, %s, %s, %s, %s)
-                RETURNING id
-            """, (quiz_id, student_id, json.dumps(answers), time_taken, total_marks))
-            
-            attempt_id = cursor.fetchone()[0]
-            
-            # Award points for completing quiz
-            self.add_points(student_id, 20, "Quiz Completed")
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-            return attempt_id
-            
-        except Exception as e:
-            print(f"Error submitting quiz: {e}")
-            return None
-    
-    def add_subject_for_class(self, class_name, subject):
-        """Add a new subject for a specific class (used when student wants to add curriculum)"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor()
-        
-            # Check if subject already exists
-            cursor.execute("""
-                SELECT COUNT(*) FROM curriculum 
-                WHERE class = %s AND subject = %s
-            """, (class_name, subject))
-        
-            exists = cursor.fetchone()[0] > 0
-        
-            if not exists:
-                # Create empty curriculum entry
-                cursor.execute("""
-                    INSERT INTO curriculum (class, subject, curriculum, updated_at)
-                    VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
-                """, (class_name, subject, "Curriculum pending - Please contact your teacher to add content."))
-            
-                conn.commit()
-                cursor.close()
-                conn.close()
-                return True, "Subject added successfully!"
-            else:
-                cursor.close()
-                conn.close()
-                return False, "This subject already exists for your class."
-            
-        except Exception as e:
-            print(f"Error adding subject: {e}")
-            return False, f"Error: {str(e)}"
-
-    def evaluate_quiz_attempt(self, attempt_id, score, feedback):
-        """Evaluate and score a quiz attempt"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                UPDATE quiz_attempts
-                SET score = %s, feedback = %s, evaluated_at = CURRENT_TIMESTAMP
-                WHERE id = %s
-            """, (score, feedback, attempt_id))
-            
-            # Get student_id and award bonus points for good performance
-            cursor.execute("SELECT student_id, total_marks FROM quiz_attempts WHERE id = %s", (attempt_id,))
-            result = cursor.fetchone()
-            
-            if result:
-                student_id, total_marks = result
-                percentage = (score / total_marks) * 100 if total_marks > 0 else 0
-                
-                if percentage >= 90:
-                    self.add_points(student_id, 30, "Quiz Excellence (90%+)")
-                elif percentage >= 75:
-                    self.add_points(student_id, 20, "Quiz Success (75%+)")
-                elif percentage >= 50:
-                    self.add_points(student_id, 10, "Quiz Passed (50%+)")
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error evaluating quiz: {e}")
-            return False
-    
-    def get_student_quiz_attempts(self, student_id, quiz_id=None):
-        """Get quiz attempts by student"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            if quiz_id:
-                cursor.execute("""
-                    SELECT qa.*, q.title, q.subject
-                    FROM quiz_attempts qa
-                    JOIN quizzes q ON qa.quiz_id = q.id
-                    WHERE qa.student_id = %s AND qa.quiz_id = %s
-                    ORDER BY qa.submitted_at DESC
-                """, (student_id, quiz_id))
-            else:
-                cursor.execute("""
-                    SELECT qa.*, q.title, q.subject
-                    FROM quiz_attempts qa
-                    JOIN quizzes q ON qa.quiz_id = q.id
-                    WHERE qa.student_id = %s
-                    ORDER BY qa.submitted_at DESC
-                """, (student_id,))
-            
-            results = cursor.fetchall()
-            
-            cursor.close()
-            conn.close()
-            
-            return [dict(row) for row in results]
-            
-        except Exception as e:
-            print(f"Error fetching quiz attempts: {e}")
-            return []
-    
-    # ==================== NOTIFICATIONS ====================
-    
-    def create_notification(self, user_id, title, message, notification_type):
-        """Create a notification for a user"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO notifications (user_id, title, message, notification_type)
-                VALUES (%s, %s, %s, %s)
-                RETURNING id
-            """, (user_id, title, message, notification_type))
-            
-            notification_id = cursor.fetchone()[0]
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-            return notification_id
-            
-        except Exception as e:
-            print(f"Error creating notification: {e}")
-            return None
-    
-    def get_user_notifications(self, user_id, unread_only=False):
-        """Get notifications for a user"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            if unread_only:
-                cursor.execute("""
-                    SELECT * FROM notifications
-                    WHERE user_id = %s AND is_read = FALSE
-                    ORDER BY created_at DESC
-                """, (user_id,))
-            else:
-                cursor.execute("""
-                    SELECT * FROM notifications
-                    WHERE user_id = %s
-                    ORDER BY created_at DESC
-                    LIMIT 50
-                """, (user_id,))
-            
-            results = cursor.fetchall()
-            
-            cursor.close()
-            conn.close()
-            
-            return [dict(row) for row in results]
-            
-        except Exception as e:
-            print(f"Error fetching notifications: {e}")
-            return []
-    
-    def mark_notification_read(self, notification_id):
-        """Mark a notification as read"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                UPDATE notifications
-                SET is_read = TRUE
-                WHERE id = %s
-            """, (notification_id,))
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error marking notification: {e}")
-            return False
-    
-    # ==================== PARENT PORTAL ====================
-    
-    def link_parent_student(self, parent_id, student_id, relationship='parent'):
-        """Link a parent to a student"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO parent_students (parent_id, student_id, relationship)
-                VALUES (%s, %s, %s)
-                ON CONFLICT (parent_id, student_id) DO NOTHING
-            """, (parent_id, student_id, relationship))
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error linking parent-student: {e}")
-            return False
-    
-    def get_parent_students(self, parent_id):
-        """Get all students linked to a parent"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            cursor.execute("""
-                SELECT u.*, ps.relationship
-                FROM user_details u
-                JOIN parent_students ps ON u.id = ps.student_id
-                WHERE ps.parent_id = %s
-            """, (parent_id,))
-            
-            results = cursor.fetchall()
-            
-            cursor.close()
-            conn.close()
-            
-            return [dict(row) for row in results]
-            
-        except Exception as e:
-            print(f"Error fetching parent students: {e}")
-            return []
-    
-    def get_student_overview_for_parent(self, student_id):
-        """Get comprehensive overview of student for parent"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            # Get basic info
-            cursor.execute("SELECT * FROM user_details WHERE id = %s", (student_id,))
-            student_info = dict(cursor.fetchone())
-            
-            # Get gamification stats
-            cursor.execute("SELECT * FROM student_gamification WHERE student_id = %s", (student_id,))
-            gamification = cursor.fetchone()
-            student_info['gamification'] = dict(gamification) if gamification else None
-            
-            # Get recent activities
-            cursor.execute("""
-                SELECT COUNT(*) as paper_count
-                FROM paper_analysis
-                WHERE student_id = %s AND created_at > NOW() - INTERVAL '30 days'
-            """, (student_id,))
-            student_info['recent_papers'] = cursor.fetchone()['paper_count']
-            
-            cursor.execute("""
-                SELECT COUNT(*) as quiz_count
-                FROM quiz_attempts
-                WHERE student_id = %s AND submitted_at > NOW() - INTERVAL '30 days'
-            """, (student_id,))
-            student_info['recent_quizzes'] = cursor.fetchone()['quiz_count']
-            
-            # Get average scores
-            cursor.execute("""
-                SELECT AVG(score::float / total_marks * 100) as avg_score
-                FROM quiz_attempts
-                WHERE student_id = %s AND score IS NOT NULL
-            """, (student_id,))
-            avg_result = cursor.fetchone()
-            student_info['average_score'] = round(avg_result['avg_score'], 1) if avg_result['avg_score'] else 0
-            
-            cursor.close()
-            conn.close()
-            
-            return student_info
-            
-        except Exception as e:
-            print(f"Error fetching student overview: {e}")
-            return None
-    
-    # ==================== TEACHER ANALYTICS ====================
-    
-    def get_class_analytics(self, class_name):
-        """Get comprehensive analytics for a class"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            analytics = {}
-            
-            # Total students
-            cursor.execute("""
-                SELECT COUNT(*) as total_students
-                FROM user_details
-                WHERE role = 'student' AND class = %s
-            """, (class_name,))
-            analytics['total_students'] = cursor.fetchone()['total_students']
-            
-            # Average points
-            cursor.execute("""
-                SELECT AVG(sg.total_points) as avg_points, AVG(sg.current_streak) as avg_streak
-                FROM student_gamification sg
-                JOIN user_details u ON sg.student_id = u.id
-                WHERE u.class = %s
-            """, (class_name,))
-            result = cursor.fetchone()
-            analytics['avg_points'] = round(result['avg_points'] or 0, 1)
-            analytics['avg_streak'] = round(result['avg_streak'] or 0, 1)
-            
-            # Paper submissions in last 30 days
-            cursor.execute("""
-                SELECT COUNT(*) as paper_count
-                FROM paper_analysis pa
-                JOIN user_details u ON pa.student_id = u.id
-                WHERE u.class = %s AND pa.created_at > NOW() - INTERVAL '30 days'
-            """, (class_name,))
-            analytics['recent_papers'] = cursor.fetchone()['paper_count']
-            
-            # Average quiz performance
-            cursor.execute("""
-                SELECT AVG(qa.score::float / qa.total_marks * 100) as avg_quiz_score
-                FROM quiz_attempts qa
-                JOIN user_details u ON qa.student_id = u.id
-                WHERE u.class = %s AND qa.score IS NOT NULL
-            """, (class_name,))
-            avg_result = cursor.fetchone()
-            analytics['avg_quiz_score'] = round(avg_result['avg_quiz_score'] or 0, 1)
-            
-            # Top performers
-            cursor.execute("""
-                SELECT u.full_name, sg.total_points, sg.level, sg.current_streak
-                FROM student_gamification sg
-                JOIN user_details u ON sg.student_id = u.id
-                WHERE u.class = %s
-                ORDER BY sg.total_points DESC
-                LIMIT 5
-            """, (class_name,))
-            analytics['top_performers'] = [dict(row) for row in cursor.fetchall()]
-            
-            # Subject-wise performance
-            cursor.execute("""
-                SELECT 
-                    sp.subject,
-                    COUNT(DISTINCT sp.student_id) AS student_count,
-                    SUM(sp.attempts) AS total_attempts,
-                    SUM(sp.correct_attempts) AS correct_attempts,
-                    ROUND(AVG((sp.correct_attempts::numeric / NULLIF(sp.attempts, 0)) * 100), 1) AS avg_accuracy
-                FROM student_progress sp
-                JOIN user_details u ON sp.student_id = u.id
-                WHERE u.class = %s
-                GROUP BY sp.subject
-            """, (class_name,))
-            analytics['subject_performance'] = [dict(row) for row in cursor.fetchall()]
-
-            cursor.close()
-            conn.close()
-            
-            return analytics
-            
-        except Exception as e:
-            print(f"Error fetching class analytics: {e}")
-            return {}
-    
-    def get_student_performance_trend(self, student_id, days=30):
-        """Get student performance trend over time"""
-        try:
-            conn = self.connect()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            # Quiz scores over time
-            cursor.execute("""
-                SELECT 
-                    DATE(submitted_at) as date,
-                    AVG(score::float / total_marks * 100) as avg_score
-                FROM quiz_attempts
-                WHERE student_id = %s 
-                    AND submitted_at > NOW() - INTERVAL '%s days'
-                    AND score IS NOT NULL
-                GROUP BY DATE(submitted_at)
-                ORDER BY date
-            """, (student_id, days))
-            
-            trend_data = [dict(row) for row in cursor.fetchall()]
-            
-            cursor.close()
-            conn.close()
-            
-            return trend_data
-            
-        except Exception as e:
-            print(f"Error fetching performance trend: {e}")
-            return []
-    
-    # ==================== SEARCH STUDENTS ====================
-    
-    def search_students(self, email=None, class_name=None):
-        try:
-            conn = self.connect()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-            if email:
-                cursor.execute("""
-                    SELECT id, full_name, email, class 
-                    FROM user_details 
-                    WHERE email = %s AND role = 'student'
-                """, (email,))
-            elif class_name:
-                cursor.execute("""
-                    SELECT id, full_name, email, class 
-                    FROM user_details 
-                    WHERE class = %s AND role = 'student'
-                """, (class_name,))
-            else:
-                return []
-        
-            results = cursor.fetchall()
-            cursor.close()
-            conn.close()
-            return [dict(row) for row in results]
-        
-        except Exception as e:
-            print(f"Error searching students: {e}")
-            return []
+from psycopg2.extras import RealDictCursor, NamedTupleCursor, Json, execute_values, register_default_json, register_default_jsonb
+from config import DB_CONFIG, get_pool
+from feedback import classify_feedback
+import streamlit as st
+import psycopg2
+import contextlib
+import functools
+import types
+import io
+import json
+import logging
+import re
+import os
+import time
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib encoder/decoder
+    orjson = None
+
+# Hot queries, prepared once per pooled connection and then run with EXECUTE.
+# Not safe behind a transaction-pooling pgbouncer (statements are per backend).
+logger = logging.getLogger(__name__)
+
+# Prepared statements outlive schema changes on a pooled connection, so they name their
+# columns: with SELECT * a new column fails them with "cached plan must not change result type"
+PREPARED_STATEMENTS = {
+    "get_user_by_email": ("(text)", "SELECT id, full_name, email, password_hash, role, class FROM user_details WHERE lower(email) = lower($1)"),
+    "get_curriculum": ("(text, text)", "SELECT curriculum FROM curriculum WHERE class = $1 AND subject = $2"),
+    "upsert_topic_progress": (
+        "(int, text, text, int, text)",
+        """
+        INSERT INTO student_progress (student_id, class, subject, topic, attempts, correct_attempts, last_feedback)
+        SELECT $1, COALESCE((SELECT class FROM user_details WHERE id = $1), 'Unknown'), $2, $3, 1, $4, $5
+        ON CONFLICT (student_id, subject, topic) DO UPDATE
+        SET attempts = student_progress.attempts + 1,
+            correct_attempts = student_progress.correct_attempts + EXCLUDED.correct_attempts,
+            last_feedback = EXCLUDED.last_feedback,
+            updated_at = CURRENT_TIMESTAMP
+        """
+    ),
+    "award_points": ("(int, int)", "SELECT new_total, new_streak, new_level FROM award_points($1, $2)"),
+    "get_badge_names": ("(int)", "SELECT badge_name FROM badges WHERE student_id = $1"),
+    "get_student_gamification": (
+        "(int)",
+        "SELECT id, student_id, total_points, current_streak, longest_streak, last_activity_date, level, "
+        "created_at, updated_at FROM student_gamification WHERE student_id = $1"
+    ),
+    "get_quiz_questions": (
+        "(int)",
+        "SELECT id, quiz_id, question_text, question_type, options, correct_answer, marks, order_num "
+        "FROM quiz_questions WHERE quiz_id = $1 ORDER BY order_num"
+    ),
+    "get_unread_notifications": (
+        "(int, int, int)",
+        "SELECT id, user_id, title, message, notification_type, is_read, created_at FROM notifications "
+        "WHERE user_id = $1 AND is_read = FALSE AND ($2::int IS NULL OR id < $2) "
+        "ORDER BY id DESC LIMIT $3"
+    ),
+    "get_recent_notifications": (
+        "(int, int, int)",
+        "SELECT id, user_id, title, message, notification_type, is_read, created_at FROM notifications "
+        "WHERE user_id = $1 AND ($2::int IS NULL OR id < $2) "
+        "ORDER BY id DESC LIMIT $3"
+    ),
+}
+
+# JSON/JSONB columns are encoded and decoded with orjson when it is installed
+if orjson is not None:
+    def _json_dumps(obj):
+        # str, not bytes, so psycopg2 binds it as text; non-str keys as json.dumps allows
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    _json_loads = orjson.loads
+    register_default_json(globally=True, loads=orjson.loads)
+    register_default_jsonb(globally=True, loads=orjson.loads)
+else:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
+# Above this many rows bulk writes stream through COPY instead of multi-row VALUES
+COPY_THRESHOLD = 500
+
+# Badge rules: (name, earned(total_points, current_streak, level), description, icon)
+BADGE_RULES = [
+    # Point-based badges
+    ("Century", lambda points, streak, level: points >= 100, "Earned 100 points", "🏆"),
+    ("Champion", lambda points, streak, level: points >= 500, "Earned 500 points", "🏅"),
+    ("Legend", lambda points, streak, level: points >= 1000, "Earned 1000 points", "👑"),
+    # Streak-based badges
+    ("Week Warrior", lambda points, streak, level: streak >= 7, "7-day learning streak", "🔥"),
+    ("Month Master", lambda points, streak, level: streak >= 30, "30-day learning streak", "⭐"),
+    # Level-based badges
+    ("Rising Star", lambda points, streak, level: level >= 5, "Reached Level 5", "🌟"),
+    ("Superstar", lambda points, streak, level: level >= 10, "Reached Level 10", "💫"),
+]
+
+# Precompiled patterns for parsing model analyses and feedback
+_RE_WEAK_SECTION = re.compile(r"AREAS?\s+FOR\s+IMPROVEMENT[:\-–]*\s*([\s\S]*?)(?=\d+\.\s+[A-Z]|\Z)", re.IGNORECASE)
+_RE_BULLET_ONLY = re.compile(r'^[\*•\-]+$')
+_RE_ENCOURAGEMENT = re.compile(r'[A-Z][a-z]+.*!$')
+_RE_NUMBERED = re.compile(r'^\d+[\.)]\s+[A-Z]')
+_RE_LEADING_BULLET = re.compile(r'^[•\-*]\s*')
+_RE_MARKS = re.compile(r'(\d+)\s*(?:out of|/)\s*(\d+)', re.IGNORECASE)
+_RE_PCT = re.compile(r'(\d+(?:\.\d+)?)\s*%')
+
+def _db_op(default=None, retries=0):
+    """Decorate a Database method: log failures with traceback and return `default`
+    
+    `default` is the value callers treat as "failed" (a callable such as list is
+    called for a fresh value). OperationalError - a dropped connection or restarting
+    server - is retried `retries` times with backoff; only idempotent reads opt in.
+    If the last attempt still fails that way, the user sees one error message.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            for attempt in range(retries + 1):
+                try:
+                    return fn(*args, **kwargs)
+                except psycopg2.OperationalError as e:
+                    if attempt < retries:
+                        logger.warning("%s: transient database error, retrying", fn.__name__, exc_info=True)
+                        time.sleep(0.1 * 2 ** attempt)
+                        continue
+                    logger.exception("%s failed", fn.__name__)
+                    st.error(f"❌ Database connection failed: {str(e)}")
+                except Exception:
+                    logger.exception("%s failed", fn.__name__)
+                return default() if callable(default) else default
+        return wrapper
+    return decorate
+
+# ==================== CACHED READS ====================
+# Read-mostly reference data, cached across Streamlit reruns. The Database
+# argument is underscore-prefixed so st.cache_data does not hash it. Errors
+# propagate out of these functions so failures are never cached.
+
+@st.cache_data(ttl=300, max_entries=512, show_spinner=False)
+def _load_curriculum(_db, class_name, subject):
+    with _db._session() as cursor:
+        _db._execute_prepared(cursor, "get_curriculum", (class_name, subject))
+        result = cursor.fetchone()
+        return result[0] if result else None
+
+@st.cache_data(ttl=300, max_entries=512, show_spinner=False)
+def _load_subjects_for_class(_db, class_name):
+    with _db._session() as cursor:
+        cursor.execute("""
+            SELECT DISTINCT subject 
+            FROM curriculum 
+            WHERE class = %s
+            ORDER BY subject
+        """, (class_name,))
+        return [row[0] for row in cursor.fetchall()]
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _load_all_curricula(_db):
+    # Listing only, from the summary view - the curriculum text itself is fetched per subject via get_curriculum
+    return list(_db.iter_rows(
+        "all_curricula", "SELECT class, subject, updated_at FROM mv_curricula_summary ORDER BY class, subject"
+    ))
+
+@st.cache_data(ttl=60, max_entries=512, show_spinner=False)
+def _load_students_in_class(_db, class_name):
+    with _db._session(dict_cursor=True) as cursor:
+        cursor.execute("""
+            SELECT id, full_name, email
+            FROM user_details
+            WHERE role = 'student' AND class = %s
+            ORDER BY full_name
+        """, (class_name,))
+        return [dict(row) for row in cursor.fetchall()]
+
+@st.cache_data(ttl=60, max_entries=512, show_spinner=False)
+def _load_quiz_scores(_db, student_id):
+    # Every graded attempt as parallel arrays sorted by time, so any `days` window is a slice.
+    # submitted_at is session-local (no time zone); the timestamptz cast makes the epoch
+    # absolute so it compares correctly with time.time()
+    with _db._session() as cursor:
+        cursor.execute("""
+            SELECT submitted_at::date, extract(epoch FROM submitted_at::timestamptz), score, total_marks
+            FROM quiz_attempts
+            WHERE student_id = %s AND score IS NOT NULL AND total_marks > 0
+            ORDER BY submitted_at
+        """, (student_id,))
+        rows = cursor.fetchall()
+    if not rows:
+        return np.empty(0, dtype="datetime64[D]"), np.empty(0), np.empty(0, np.float32), np.empty(0, np.float32)
+    dates, epochs, scores, totals = zip(*rows)
+    return (
+        np.asarray(dates, dtype="datetime64[D]"),
+        np.asarray(epochs, dtype=np.float64),
+        np.asarray(scores, dtype=np.float32),
+        np.asarray(totals, dtype=np.float32),
+    )
+
+@st.cache_resource
+def _db_config():
+    """Database settings, read and validated once per process (read-only mapping)"""
+    if not all([DB_CONFIG["host"], DB_CONFIG["database"], DB_CONFIG["user"], DB_CONFIG["password"]]):
+        raise RuntimeError("Database configuration incomplete. Please check your secrets.toml file.")
+    return types.MappingProxyType(dict(DB_CONFIG))
+
+def _clear_curriculum_cache():
+    """Drop cached curriculum reads after a curriculum write"""
+    _load_curriculum.clear()
+    _load_subjects_for_class.clear()
+    _load_all_curricula.clear()
+
+
+class Database:
+    def __init__(self):
+        # Raises RuntimeError if the configuration is incomplete
+        self.config = _db_config()
+        self._pool = None
+        self._pool_pid = None
+
+    @property
+    def pool(self):
+        """The process's shared connection pool, looked up once per instance (and again after a fork)"""
+        pid = os.getpid()
+        if self._pool_pid != pid:
+            self._pool, self._pool_pid = get_pool(pid), pid
+        return self._pool
+
+    def connect(self):
+        """Check out a database connection from the shared pool"""
+        try:
+            return self.pool.getconn()
+        except Exception:
+            # Logged only; _db_op tells the user once, after any retries have run out
+            logger.exception("Database connection error")
+            return None
+
+    def release(self, conn):
+        """Return a connection to the pool (any open transaction is rolled back)"""
+        if conn:
+            self.pool.putconn(conn)
+
+
+    @contextlib.contextmanager
+    def _session(self, dict_cursor=False, cursor_factory=None):
+        """Pooled connection and cursor for one transaction
+        
+        Commits when the block exits normally, rolls back if it raises, and always
+        returns the connection to the pool.
+        """
+        conn = self.connect()
+        if conn is None:
+            raise psycopg2.OperationalError("No database connection available")
+        try:
+            factory = cursor_factory or (RealDictCursor if dict_cursor else None)
+            with conn, conn.cursor(cursor_factory=factory) as cursor:
+                yield cursor
+        finally:
+            self.release(conn)
+
+    def _execute_prepared(self, cursor, name, params):
+        """Run a statement from PREPARED_STATEMENTS, preparing it on first use per connection"""
+        conn = cursor.connection
+        if name not in conn.prepared:
+            arg_types, sql = PREPARED_STATEMENTS[name]
+            cursor.execute(f"PREPARE {name}{arg_types} AS {sql}")
+            conn.prepared.add(name)
+        placeholders = ", ".join(["%s"] * len(params))
+        cursor.execute(f"EXECUTE {name}({placeholders})", params)
+
+    def iter_rows(self, name, query, params=None, itersize=200):
+        """Yield rows as dicts through a named server-side cursor, `itersize` rows per fetch
+        
+        The pooled connection is held until the generator is exhausted or closed.
+        """
+        conn = self.connect()
+        if conn is None:
+            raise psycopg2.OperationalError("No database connection available")
+        try:
+            with conn.cursor(name=name, cursor_factory=RealDictCursor) as cursor:
+                cursor.itersize = itersize
+                cursor.execute(query, params)
+                for row in cursor:
+                    yield dict(row)
+        finally:
+            self.release(conn)
+
+    # ==================== USER MANAGEMENT ====================
+    
+    @_db_op(default=False)
+    def create_user(self, user_data):
+        """Create a new user account"""
+        # Teachers don't need class or parent_id; students get their
+        # gamification row in the same statement
+        is_teacher = user_data['role'] == 'teacher'
+        query = """
+            WITH u AS (
+                INSERT INTO user_details (full_name, email, password_hash, role, class, parent_id)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                RETURNING id, role
+            ), g AS (
+                INSERT INTO student_gamification (student_id)
+                SELECT id FROM u WHERE role = 'student'
+                ON CONFLICT (student_id) DO NOTHING
+            )
+            SELECT id FROM u
+        """
+        with self._session() as cursor:
+            cursor.execute(query, (
+                user_data['full_name'],
+                user_data['email'],
+                user_data['password_hash'],
+                user_data['role'],
+                None if is_teacher else user_data.get('class'),
+                None if is_teacher else user_data.get('parent_id')
+            ))
+        
+            if cursor.fetchone() is None:
+                raise Exception("Failed to create user - no ID returned")
+
+        if user_data['role'] == 'student':
+            _load_students_in_class.clear()
+        
+        return True
+    
+    @_db_op(default=None, retries=2)
+    def get_user_by_email(self, email):
+        """Get user details by email"""
+        with self._session(dict_cursor=True) as cursor:
+            self._execute_prepared(cursor, "get_user_by_email", (email,))
+        
+            user = cursor.fetchone()
+        
+            return dict(user) if user else None
+    
+    # ==================== CURRICULUM MANAGEMENT ====================
+    
+    @_db_op(default=False)
+    def save_curriculum(self, class_name, subject, curriculum_text):
+        """Save or update curriculum for a class and subject"""
+        with self._session() as cursor:
+            query = """
+                INSERT INTO curriculum (class, subject, curriculum, updated_at)
+                VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT (class, subject) 
+                DO UPDATE SET curriculum = EXCLUDED.curriculum, updated_at = CURRENT_TIMESTAMP
+            """
+        
+            cursor.execute(query, (class_name, subject, curriculum_text))
+        
+        self._refresh_curricula_summary()
+        _clear_curriculum_cache()
+        
+        return True
+    
+    @_db_op(default=None)
+    def _refresh_curricula_summary(self):
+        """Rebuild mv_curricula_summary after a curriculum write (readers are not blocked)"""
+        with self._session() as cursor:
+            cursor.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_curricula_summary")
+    
+    @_db_op(default=None, retries=2)
+    def get_curriculum(self, class_name, subject):
+        """Get curriculum for a specific class and subject"""
+        return _load_curriculum(self, class_name, subject)
+    
+    @_db_op(default=list, retries=2)
+    def get_all_subjects_for_class(self, class_name):
+        """Get all subjects that have curriculum for a specific class"""
+        return _load_subjects_for_class(self, class_name)
+    
+    @_db_op(default=list, retries=2)
+    def get_all_curricula(self):
+        """Get class/subject/updated_at for every curriculum (text via get_curriculum)"""
+        return _load_all_curricula(self)
+    
+    # ==================== PAPER ANALYSIS ====================
+    
+    @_db_op(default=None)
+    def save_paper_analysis(self, class_name, student_id, student_name, subject, student_paper, analysis):
+        """Save paper analysis to database"""
+        with self._session() as cursor:
+            # Extract weak areas once at write time so readers never re-parse the analysis
+            weak_areas = self._extract_weak_areas_from_analysis(analysis) if analysis else []
+        
+            query = """
+                INSERT INTO paper_analysis (class, student_id, student_name, subject, student_paper, analysis_by_model, weak_areas)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                RETURNING id
+            """
+        
+            cursor.execute(query, (class_name, student_id, student_name, subject, student_paper, analysis, Json(weak_areas, dumps=_json_dumps)))
+        
+            analysis_id = cursor.fetchone()[0]
+        
+            # Award points for paper submission
+            self.add_points(student_id, 10, "Paper Analysis Completed", cursor=cursor)
+        
+            return analysis_id
+    
+    @_db_op(default=list)
+    def save_paper_analyses_bulk(self, rows):
+        """Save many paper analyses (e.g. a historical import) in one transaction
+        
+        rows: iterable of (class_name, student_id, student_name, subject, student_paper, analysis).
+        Each paper earns the usual 10 points, applied as one aggregate update; streaks and
+        badges are left alone since imported papers are not new activity. Returns the new ids.
+        """
+        values = []
+        points = {}
+        for class_name, student_id, student_name, subject, student_paper, analysis in rows:
+            weak_areas = self._extract_weak_areas_from_analysis(analysis) if analysis else []
+            values.append((class_name, student_id, student_name, subject, student_paper, analysis, Json(weak_areas, dumps=_json_dumps)))
+            points[student_id] = points.get(student_id, 0) + 10
+        if not values:
+            return []
+        
+        with self._session() as cursor:
+            ids = execute_values(cursor, """
+                INSERT INTO paper_analysis (class, student_id, student_name, subject, student_paper, analysis_by_model, weak_areas)
+                VALUES %s
+                RETURNING id
+            """, values, fetch=True)
+            
+            execute_values(cursor, """
+                UPDATE student_gamification g
+                SET total_points = g.total_points + agg.pts,
+                    level = (g.total_points + agg.pts) / 100 + 1,
+                    updated_at = CURRENT_TIMESTAMP
+                FROM (VALUES %s) AS agg(student_id, pts)
+                WHERE g.student_id = agg.student_id
+            """, list(points.items()))
+        
+        return [row[0] for row in ids]
+    
+    @_db_op(default=list, retries=2)
+    def get_student_analysis_history(self, student_id, limit=25, before=None):
+        """Get a student's paper analyses, newest first (listing only - text via get_analysis)
+        
+        Pass the last row's created_at as `before` to fetch the next page; limit=None returns all.
+        """
+        query = "SELECT id, subject, created_at FROM paper_analysis WHERE student_id = %s"
+        params = [student_id]
+        if before is not None:
+            query += " AND created_at < %s"
+            params.append(before)
+        query += " ORDER BY created_at DESC LIMIT %s"
+        params.append(limit)
+        
+        if limit is None:
+            # Whole history: page through it with a server-side cursor
+            return list(self.iter_rows("analysis_history", query, params))
+        with self._session(dict_cursor=True) as cursor:
+            cursor.execute(query, params)
+            return [dict(row) for row in cursor.fetchall()]
+    
+    @_db_op(default=None, retries=2)
+    def get_analysis(self, analysis_id):
+        """Get the model's analysis text for one paper"""
+        with self._session() as cursor:
+            cursor.execute("SELECT analysis_by_model FROM paper_analysis WHERE id = %s", (analysis_id,))
+            result = cursor.fetchone()
+        
+            return result[0] if result else None
+    
+    # ==================== WEAK TOPICS MANAGEMENT ====================
+    
+    @_db_op(default=list, retries=2)
+    def get_weak_topics_history(self, student_id):
+        """Extract weak areas from past paper analyses for a student"""
+        with self._session() as cursor:
+            # The analysis text is only shipped for rows saved before weak_areas existed
+            query = """
+                SELECT id, subject, weak_areas,
+                       CASE WHEN weak_areas IS NULL THEN analysis_by_model END,
+                       created_at
+                FROM paper_analysis
+                WHERE student_id = %s
+                ORDER BY created_at DESC
+            """
+        
+            cursor.execute(query, (student_id,))
+            results = cursor.fetchall()
+        
+            weak_topics = []
+        
+            for row in results:
+                analysis_id, subject, weak_areas, analysis_text, created_at = row
+            
+                if weak_areas is None and analysis_text:
+                    weak_areas = self._extract_weak_areas_from_analysis(analysis_text)
+            
+                if weak_areas:
+                    for weak_area in weak_areas:
+                        weak_topics.append({
+                            'analysis_id': analysis_id,
+                            'subject': subject,
+                            'weak_area': weak_area,
+                            'created_at': created_at
+                        })
+        
+            return weak_topics
+    
+    def _extract_weak_areas_from_analysis(self, analysis_text):
+        """
+        Enhanced helper method to extract weak areas from analysis text.
+        Now optimized for curriculum-based topic names without explanations.
+        """
+        weak_areas = []
+        
+        # Find the "AREAS FOR IMPROVEMENT" section
+        match = _RE_WEAK_SECTION.search(analysis_text)
+        
+        if not match:
+            return weak_areas
+        
+        weak_section = match.group(1).strip()
+        
+        if not weak_section:
+            return weak_areas
+        
+        # Split by lines
+        lines = weak_section.split('\n')
+        
+        for line in lines:
+            line = line.strip()
+            
+            # Skip empty lines or lines with only asterisks/bullets
+            if not line or _RE_BULLET_ONLY.match(line):
+                continue
+            
+            # Stop at encouragement text
+            if line.startswith("You're") or _RE_ENCOURAGEMENT.search(line):
+                break
+            
+            # Stop at table markup
+            if line.startswith('|'):
+                break
+            
+            # Stop at numbered recommendations
+            if _RE_NUMBERED.match(line):
+                break
+            
+            # Remove bullet markers
+            cleaned_line = _RE_LEADING_BULLET.sub('', line).strip()
+            
+            # Only add if it's a reasonable topic name (not empty after cleaning)
+            if cleaned_line and len(cleaned_line) < 100:
+                weak_areas.append(cleaned_line)
+        
+        return weak_areas
+
+    @_db_op(default=0)
+    def backfill_weak_areas(self):
+        """One-time backfill of weak_areas for analyses saved before the column existed"""
+        with self._session() as cursor:
+            cursor.execute("""
+                SELECT id, analysis_by_model
+                FROM paper_analysis
+                WHERE weak_areas IS NULL
+            """)
+            rows = cursor.fetchall()
+        
+            values = [
+                (analysis_id, self._extract_weak_areas_from_analysis(analysis_text) if analysis_text else [])
+                for analysis_id, analysis_text in rows
+            ]
+            if len(values) > COPY_THRESHOLD:
+                # COPY text format: one tab-separated line per row, backslashes escaped
+                buf = io.StringIO()
+                for analysis_id, weak_areas in values:
+                    payload = _json_dumps(weak_areas).replace("\\", "\\\\")
+                    buf.write(f"{analysis_id}\t{payload}\n")
+                buf.seek(0)
+                cursor.execute("""
+                    CREATE TEMP TABLE tmp_weak_areas (id int, weak_areas jsonb) ON COMMIT DROP
+                """)
+                cursor.copy_expert("COPY tmp_weak_areas (id, weak_areas) FROM STDIN WITH (FORMAT text)", buf)
+                cursor.execute("""
+                    UPDATE paper_analysis AS pa
+                    SET weak_areas = v.weak_areas
+                    FROM tmp_weak_areas AS v
+                    WHERE pa.id = v.id
+                """)
+            else:
+                execute_values(cursor, """
+                    UPDATE paper_analysis AS pa
+                    SET weak_areas = v.weak_areas::jsonb
+                    FROM (VALUES %s) AS v(id, weak_areas)
+                    WHERE pa.id = v.id
+                """, [(analysis_id, Json(weak_areas, dumps=_json_dumps)) for analysis_id, weak_areas in values], page_size=500)
+        
+            return len(rows)
+    
+    @_db_op(default=False)
+    def save_learned_topic(self, student_id, class_name, subject, topic, content):
+        """Save learned topic for a student"""
+        logger.debug("Saving learned topic: student_id=%s, class=%s, subject=%s, topic=%s, content length=%s",
+                     student_id, class_name, subject, topic, len(content) if content else 0)
+    
+        with self._session() as cursor:
+            cursor.execute("""
+                INSERT INTO learned_topics (student_id, class, subject, topic, learned_content)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (student_id, subject, topic)
+                DO UPDATE SET learned_content = EXCLUDED.learned_content,
+                            created_at = CURRENT_TIMESTAMP;
+            """, (student_id, class_name, subject, topic, content))
+        
+            logger.debug("Learned topic upserted, rows affected: %s", cursor.rowcount)
+        
+            return True
+
+    @_db_op(default=list, retries=2)
+    def get_learned_topics(self, student_id, class_name):
+        """Get topics learned by the student for a specific class"""
+        with self._session(dict_cursor=True) as cursor:
+            cursor.execute("""
+                SELECT topic, learned_content, created_at, subject, class
+                FROM learned_topics
+                WHERE student_id = %s AND class = %s
+                ORDER BY created_at DESC
+            """, (student_id, class_name))
+
+            results = cursor.fetchall()
+
+
+            return [dict(row) for row in results]
+
+    
+    # ==================== STUDENT PROGRESS TRACKING ====================
+    
+    @_db_op(default=False)
+    def save_practice_result(self, student_id, subject, topic, question, answer, feedback):
+        """Save student's practice question result and update progress tracking"""
+        with self._session() as cursor:
+            is_correct = classify_feedback(feedback)
+        
+            # Single-round-trip upsert keyed on the (student_id, subject, topic) unique index
+            self._execute_prepared(
+                cursor, "upsert_topic_progress",
+                (student_id, subject, topic, 1 if is_correct else 0, feedback)
+            )
+        
+            # Award points for practicing
+            points = 5 if is_correct else 2
+            self.add_points(student_id, points, f"Practice: {topic}", cursor=cursor)
+        
+            return True
+        
+    @_db_op(default=list, retries=2)
+    def get_student_progress(self, student_id, subject=None, limit=25, before=None):
+        """Get student's practice progress, most recently practised first
+        
+        Pass the last row's updated_at as `before` to fetch the next page; limit=None returns all.
+        """
+        with self._session(dict_cursor=True) as cursor:
+            query = """
+                SELECT subject, topic, attempts, correct_attempts, updated_at
+                FROM student_progress
+                WHERE student_id = %s
+            """
+            params = [student_id]
+            if subject:
+                query += " AND subject = %s"
+                params.append(subject)
+            if before is not None:
+                query += " AND updated_at < %s"
+                params.append(before)
+            # LIMIT NULL is LIMIT ALL in Postgres
+            query += " ORDER BY updated_at DESC LIMIT %s"
+            params.append(limit)
+        
+            cursor.execute(query, params)
+        
+            results = cursor.fetchall()
+        
+            return [dict(row) for row in results]
+
+    @_db_op(default=list, retries=2)
+    def get_students_in_class(self, class_name):
+        """Get all students in a specific class"""
+        return _load_students_in_class(self, class_name)
+
+    @_db_op(default=list, retries=2)
+    def get_student_paper_reports(self, student_id):
+        """Get summary of all paper analyses for a student"""
+        with self._session(cursor_factory=NamedTupleCursor) as cursor:
+            cursor.execute("""
+                SELECT 
+                    id,
+                    subject,
+                    created_at,
+                    analysis_by_model
+                FROM paper_analysis
+                WHERE student_id = %s
+                ORDER BY created_at DESC
+            """, (student_id,))
+        
+            results = cursor.fetchall()
+        
+            # Extract marks and percentages from analysis
+            paper_reports = []
+            for row in results:
+                analysis = row.analysis_by_model
+            
+                # Try to extract marks from analysis text
+                marks_match = _RE_MARKS.search(analysis)
+                percentage_match = _RE_PCT.search(analysis)
+            
+                obtained_marks = marks_match.group(1) if marks_match else "N/A"
+                total_marks = marks_match.group(2) if marks_match else "N/A"
+                percentage = percentage_match.group(1) if percentage_match else "N/A"
+            
+                paper_reports.append({
+                    'id': row.id,
+                    'subject': row.subject,
+                    'date': row.created_at.strftime('%Y-%m-%d'),
+                    'obtained_marks': obtained_marks,
+                    'total_marks': total_marks,
+                    'percentage': percentage
+                })
+        
+            return paper_reports
+
+    @_db_op(default=list, retries=2)
+    def get_student_quiz_summary(self, student_id):
+        """Get summary of all quiz attempts for a student"""
+        with self._session(cursor_factory=NamedTupleCursor) as cursor:
+            cursor.execute("""
+                SELECT 
+                    qa.id,
+                    q.title,
+                    q.subject,
+                    qa.score,
+                    qa.total_marks,
+                    qa.submitted_at,
+                    qa.time_taken
+                FROM quiz_attempts qa
+                JOIN quizzes q ON qa.quiz_id = q.id
+                WHERE qa.student_id = %s AND qa.score IS NOT NULL
+                ORDER BY qa.submitted_at DESC
+            """, (student_id,))
+        
+            results = cursor.fetchall()
+        
+            quiz_summary = []
+            for row in results:
+                percentage = round((row.score / row.total_marks) * 100, 1) if row.total_marks > 0 else 0
+            
+                quiz_summary.append({
+                    'id': row.id,
+                    'title': row.title,
+                    'subject': row.subject,
+                    'obtained_marks': row.score,
+                    'total_marks': row.total_marks,
+                    'percentage': percentage,
+                    'date': row.submitted_at.strftime('%Y-%m-%d'),
+                    'time_taken': f"{row.time_taken // 60}m {row.time_taken % 60}s"
+                })
+        
+            return quiz_summary
+
+    @_db_op(default=list, retries=2)
+    def get_student_weak_topics_with_progress(self, student_id):
+        """Get weak topics and practice progress for each"""
+        with self._session(cursor_factory=NamedTupleCursor) as cursor:
+            # Weak areas and their progress in one round-trip; rows saved before the
+            # weak_areas column existed come back once, with their analysis text
+            cursor.execute("""
+                SELECT
+                    pa.subject,
+                    wa.topic,
+                    CASE WHEN pa.weak_areas IS NULL THEN pa.analysis_by_model END AS analysis_text,
+                    sp.attempts,
+                    sp.correct_attempts,
+                    sp.updated_at
+                FROM paper_analysis pa
+                LEFT JOIN LATERAL jsonb_array_elements_text(pa.weak_areas) WITH ORDINALITY AS wa(topic, ord) ON TRUE
+                LEFT JOIN student_progress sp
+                  ON sp.student_id = pa.student_id AND sp.subject = pa.subject AND sp.topic = wa.topic
+                WHERE pa.student_id = %s
+                ORDER BY pa.created_at DESC, wa.ord
+            """, (student_id,))
+            
+            # Unique (subject, topic) pairs, in first-seen order
+            progress_by_topic = {}
+            legacy_pairs = []
+            for row in cursor:
+                if row.analysis_text:
+                    for topic in self._extract_weak_areas_from_analysis(row.analysis_text):
+                        if (row.subject, topic) not in progress_by_topic:
+                            progress_by_topic[(row.subject, topic)] = None
+                            legacy_pairs.append((row.subject, topic))
+                elif row.topic is not None and (row.subject, row.topic) not in progress_by_topic:
+                    progress_by_topic[(row.subject, row.topic)] = row if row.attempts is not None else None
+            
+            if legacy_pairs:
+                # Not yet backfilled: look their progress up against a VALUES list
+                rows = execute_values(cursor, """
+                    SELECT 
+                        sp.subject,
+                        sp.topic,
+                        sp.attempts,
+                        sp.correct_attempts,
+                        sp.updated_at
+                    FROM student_progress sp
+                    JOIN (VALUES %s) AS wt(student_id, subject, topic)
+                      ON sp.student_id = wt.student_id AND sp.subject = wt.subject AND sp.topic = wt.topic
+                """, [(student_id, subject, topic) for subject, topic in legacy_pairs], page_size=len(legacy_pairs), fetch=True)
+                progress_by_topic.update({(row.subject, row.topic): row for row in rows})
+        
+        topics_with_progress = []
+        
+        for (subject, topic), progress in progress_by_topic.items():
+            if progress:
+                accuracy = round((progress.correct_attempts / progress.attempts) * 100, 1) if progress.attempts > 0 else 0
+                
+                topics_with_progress.append({
+                    'subject': subject,
+                    'topic': topic,
+                    'attempts': progress.attempts,
+                    'correct_attempts': progress.correct_attempts,
+                    'accuracy': accuracy,
+                    'last_practiced': progress.updated_at.strftime('%Y-%m-%d'),
+                    'status': 'Improving' if accuracy >= 70 else 'Needs Practice'
+                })
+            else:
+                topics_with_progress.append({
+                    'subject': subject,
+                    'topic': topic,
+                    'attempts': 0,
+                    'correct_attempts': 0,
+                    'accuracy': 0,
+                    'last_practiced': 'Never',
+                    'status': 'Not Started'
+                })
+        
+        return topics_with_progress
+
+
+    @_db_op(default=False)
+    def _initialize_gamification(self, student_id):
+        """Initialize gamification record for a student (if missing)"""
+        with self._session() as cursor:
+            cursor.execute("""
+                INSERT INTO student_gamification (student_id)
+                VALUES (%s)
+                ON CONFLICT (student_id) DO NOTHING
+            """, (student_id,))
+        
+            return True
+    # ==================== GAMIFICATION ====================
+    
+    def add_points(self, student_id, points, reason, cursor=None):
+        """Add points to student and check for badges
+        
+        Pass the caller's cursor to award the points inside the caller's transaction.
+        """
+        if cursor is not None:
+            self._award_points(cursor, student_id, points)
+            return True
+        try:
+            with self._session() as cursor:
+                self._award_points(cursor, student_id, points)
+            return True
+            
+        except Exception:
+            logger.exception("Error adding points")
+            return False
+    
+    def _award_points(self, cursor, student_id, points):
+        # Points, streak and level are computed by award_points() in one statement
+        self._execute_prepared(cursor, "award_points", (student_id, points))
+        
+        result = cursor.fetchone()
+        if result:
+            # Check for badge achievements against the totals just returned
+            self._check_and_award_badges(cursor, student_id, result)
+    
+    def _check_and_award_badges(self, cursor, student_id, totals):
+        """Check and award badges based on achievements (errors propagate so the transaction rolls back)
+        
+        totals: (total_points, current_streak, level) as returned by award_points().
+        """
+        total_points, current_streak, level = totals
+        
+        # Badges the student already holds, fetched once
+        self._execute_prepared(cursor, "get_badge_names", (student_id,))
+        owned = {row[0] for row in cursor.fetchall()}
+        
+        badges_to_award = [
+            (name, description, icon)
+            for name, earned, description, icon in BADGE_RULES
+            if name not in owned and earned(total_points, current_streak, level)
+        ]
+        
+        # Award badges, with a notification for each
+        if badges_to_award:
+            execute_values(cursor, """
+                INSERT INTO badges (student_id, badge_name, badge_description, badge_icon)
+                VALUES %s
+            """, [(student_id, badge_name, description, icon) for badge_name, description, icon in badges_to_award])
+            
+            execute_values(cursor, """
+                INSERT INTO notifications (user_id, title, message, notification_type)
+                VALUES %s
+            """, [
+                (student_id, "New Badge Earned!", f"Congratulations! You earned the '{badge_name}' badge: {description}", "achievement")
+                for badge_name, description, _ in badges_to_award
+            ])
+    
+    @_db_op(default=None, retries=2)
+    def get_student_gamification(self, student_id):
+        """Get student's gamification stats"""
+        with self._session(dict_cursor=True) as cursor:
+            self._execute_prepared(cursor, "get_student_gamification", (student_id,))
+            result = cursor.fetchone()
+        
+            return dict(result) if result else None
+    
+    @_db_op(default=list, retries=2)
+    def get_student_badges(self, student_id):
+        """Get all badges earned by student"""
+        with self._session(dict_cursor=True) as cursor:
+            cursor.execute("""
+                SELECT * FROM badges
+                WHERE student_id = %s
+                ORDER BY earned_at DESC
+            """, (student_id,))
+        
+            results = cursor.fetchall()
+        
+            return [dict(row) for row in results]
+    
+    # ==================== QUIZ MANAGEMENT ====================
+    
+    @_db_op(default=None)
+    def create_quiz(self, teacher_id, class_name, subject, title, duration_minutes, total_marks, deadline, questions):
+        """Create a new quiz with questions"""
+        with self._session() as cursor:
+            # Insert quiz
+            cursor.execute("""
+                INSERT INTO quizzes (teacher_id, class, subject, title, duration_minutes, total_marks, deadline)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                RETURNING id
+            """, (teacher_id, class_name, subject, title, duration_minutes, total_marks, deadline))
+        
+            quiz_id = cursor.fetchone()[0]
+        
+            # Insert questions
+            execute_values(cursor, """
+                INSERT INTO quiz_questions (quiz_id, question_text, question_type, options, correct_answer, marks, order_num)
+                VALUES %s
+            """, [
+                (quiz_id, q['question'], q['type'], _json_dumps(q.get('options')), q['answer'], q['marks'], i)
+                for i, q in enumerate(questions, 1)
+            ], page_size=200)
+        
+            # Notify students (fanned out server-side, the class roster never leaves Postgres)
+            message = f"Quiz '{title}' for {subject} is now available!"
+            cursor.execute("""
+                INSERT INTO notifications (user_id, title, message, notification_type)
+                SELECT id, %s, %s, 'quiz'
+                FROM user_details
+                WHERE role = 'student' AND class = %s
+            """, ("New Quiz Available", message, class_name))
+        
+            return quiz_id
+    
+    @_db_op(default=list, retries=2)
+    def get_quizzes_for_class(self, class_name, subject=None):
+        """Get all quizzes for a class"""
+        with self._session(dict_cursor=True) as cursor:
+            if subject:
+                cursor.execute("""
+                    SELECT q.*, u.full_name as teacher_name
+                    FROM quizzes q
+                    JOIN user_details u ON q.teacher_id = u.id
+                    WHERE q.class = %s AND q.subject = %s
+                    ORDER BY q.created_at DESC
+                """, (class_name, subject))
+            else:
+                cursor.execute("""
+                    SELECT q.*, u.full_name as teacher_name
+                    FROM quizzes q
+                    JOIN user_details u ON q.teacher_id = u.id
+                    WHERE q.class = %s
+                    ORDER BY q.created_at DESC
+                """, (class_name,))
+        
+            results = cursor.fetchall()
+        
+            return [dict(row) for row in results]
+    
+    
+    
+    @_db_op(default=list, retries=2)
+    def get_quiz_questions(self, quiz_id):
+        """Get all questions for a quiz"""
+        with self._session(dict_cursor=True) as cursor:
+            self._execute_prepared(cursor, "get_quiz_questions", (quiz_id,))
+            results = cursor.fetchall()
+        
+            # Parse JSON options if they exist
+            questions = []
+            for row in results:
+                q = dict(row)
+                if q['options'] and isinstance(q['options'], str):
+                    try:
+                        q['options'] = _json_loads(q['options'])
+                    except:
+                        q['options'] = []
+                questions.append(q)
+        
+            return questions
+    
+    @_db_op(default=None)
+    def submit_quiz_attempt(self, quiz_id, student_id, answers, time_taken):
+        """Submit a quiz attempt"""
+        with self._session() as cursor:
+            # Get quiz details
+            cursor.execute("SELECT total_marks FROM quizzes WHERE id = %s", (quiz_id,))
+            total_marks = cursor.fetchone()[0]
+        
+            # Insert attempt
+            cursor.execute("""
+                INSERT INTO quiz_attempts (quiz_id, student_id, answers, time_taken, total_marks)
+                VALUES (%s, %s, %s, %s, %s)
+                RETURNING id
+            """, (quiz_id, student_id, _json_dumps(answers), time_taken, total_marks))
+        
+            attempt_id = cursor.fetchone()[0]
+        
+            # Award points for completing quiz
+            self.add_points(student_id, 20, "Quiz Completed", cursor=cursor)
+        
+        _load_quiz_scores.clear()
+        return attempt_id
+    
+    def add_subject_for_class(self, class_name, subject):
+        """Add a new subject for a specific class (used when student wants to add curriculum)"""
+        try:
+            with self._session() as cursor:
+                # Check if subject already exists
+                cursor.execute("""
+                    SELECT COUNT(*) FROM curriculum 
+                    WHERE class = %s AND subject = %s
+                """, (class_name, subject))
+        
+                exists = cursor.fetchone()[0] > 0
+        
+                if exists:
+                    return False, "This subject already exists for your class."
+                
+                # Create empty curriculum entry
+                cursor.execute("""
+                    INSERT INTO curriculum (class, subject, curriculum, updated_at)
+                    VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+                """, (class_name, subject, "Curriculum pending - Please contact your teacher to add content."))
+            
+            self._refresh_curricula_summary()
+            _clear_curriculum_cache()
+            return True, "Subject added successfully!"
+            
+        except Exception as e:
+            logger.exception("Error adding subject")
+            return False, f"Error: {str(e)}"
+
+    @_db_op(default=False)
+    def evaluate_quiz_attempt(self, attempt_id, score, feedback):
+        """Evaluate and score a quiz attempt"""
+        with self._session() as cursor:
+            cursor.execute("""
+                UPDATE quiz_attempts
+                SET score = %s, feedback = %s, evaluated_at = CURRENT_TIMESTAMP
+                WHERE id = %s
+            """, (score, feedback, attempt_id))
+        
+            # Get student_id and award bonus points for good performance
+            cursor.execute("SELECT student_id, total_marks FROM quiz_attempts WHERE id = %s", (attempt_id,))
+            result = cursor.fetchone()
+        
+            if result:
+                student_id, total_marks = result
+                percentage = (score / total_marks) * 100 if total_marks > 0 else 0
+            
+                if percentage >= 90:
+                    self.add_points(student_id, 30, "Quiz Excellence (90%+)", cursor=cursor)
+                elif percentage >= 75:
+                    self.add_points(student_id, 20, "Quiz Success (75%+)", cursor=cursor)
+                elif percentage >= 50:
+                    self.add_points(student_id, 10, "Quiz Passed (50%+)", cursor=cursor)
+        
+        _load_quiz_scores.clear()
+        return True
+    
+    @_db_op(default=list, retries=2)
+    def get_student_quiz_attempts(self, student_id, quiz_id=None, limit=None):
+        """Get quiz attempts by student, newest first (limit=None returns all of them)"""
+        query = """
+            SELECT qa.*, q.title, q.subject
+            FROM quiz_attempts qa
+            JOIN quizzes q ON qa.quiz_id = q.id
+            WHERE qa.student_id = %s AND (%s::int IS NULL OR qa.quiz_id = %s)
+            ORDER BY qa.submitted_at DESC
+            LIMIT %s
+        """
+        params = (student_id, quiz_id, quiz_id, limit)
+        
+        if limit is None:
+            # Every attempt: page through them with a server-side cursor
+            return list(self.iter_rows("stream_attempts", query, params, itersize=500))
+        # A few rows (the app asks for 1 or 5) come back in one round trip
+        with self._session(dict_cursor=True) as cursor:
+            cursor.execute(query, params)
+            return [dict(row) for row in cursor.fetchall()]
+    
+    # ==================== NOTIFICATIONS ====================
+    
+    @_db_op(default=None)
+    def create_notification(self, user_id, title, message, notification_type):
+        """Create a notification for a user"""
+        with self._session() as cursor:
+            cursor.execute("""
+                INSERT INTO notifications (user_id, title, message, notification_type)
+                VALUES (%s, %s, %s, %s)
+                RETURNING id
+            """, (user_id, title, message, notification_type))
+        
+            notification_id = cursor.fetchone()[0]
+        
+            return notification_id
+    
+    @_db_op(default=list, retries=2)
+    def get_user_notifications(self, user_id, unread_only=False, limit=50, before_id=None):
+        """Get a page of notifications for a user, newest first
+        
+        Pass the last id of the previous page as `before_id` to fetch the next one.
+        """
+        with self._session(dict_cursor=True) as cursor:
+            statement = "get_unread_notifications" if unread_only else "get_recent_notifications"
+            self._execute_prepared(cursor, statement, (user_id, before_id, limit))
+            results = cursor.fetchall()
+        
+            return [dict(row) for row in results]
+    
+    @_db_op(default=0, retries=2)
+    def get_unread_notification_count(self, user_id):
+        """Count all unread notifications for a user (not limited to one page)"""
+        with self._session() as cursor:
+            cursor.execute("""
+                SELECT COUNT(*) FROM notifications
+                WHERE user_id = %s AND is_read = FALSE
+            """, (user_id,))
+        
+            return cursor.fetchone()[0]
+    
+    @_db_op(default=False)
+    def mark_notification_read(self, notification_id):
+        """Mark a notification as read"""
+        with self._session() as cursor:
+            cursor.execute("""
+                UPDATE notifications
+                SET is_read = TRUE
+                WHERE id = %s
+            """, (notification_id,))
+        
+            return True
+    
+    # ==================== PARENT PORTAL ====================
+    
+    @_db_op(default=False)
+    def link_parent_student(self, parent_id, student_id, relationship='parent'):
+        """Link a parent to a student"""
+        with self._session() as cursor:
+            cursor.execute("""
+                INSERT INTO parent_students (parent_id, student_id, relationship)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (parent_id, student_id) DO NOTHING
+            """, (parent_id, student_id, relationship))
+        
+            return True
+    
+    @_db_op(default=list, retries=2)
+    def get_parent_students(self, parent_id):
+        """Get all students linked to a parent"""
+        with self._session(dict_cursor=True) as cursor:
+            cursor.execute("""
+                SELECT u.*, ps.relationship
+                FROM user_details u
+                JOIN parent_students ps ON u.id = ps.student_id
+                WHERE ps.parent_id = %s
+            """, (parent_id,))
+        
+            results = cursor.fetchall()
+        
+            return [dict(row) for row in results]
+    
+    @_db_op(default=None, retries=2)
+    def get_student_overview_for_parent(self, student_id):
+        """Get comprehensive overview of student for parent"""
+        with self._session(dict_cursor=True) as cursor:
+            # Basic info, gamification stats, recent activity and average score in one round-trip
+            cursor.execute("""
+                SELECT
+                    u.*,
+                    to_jsonb(sg) AS gamification,
+                    (SELECT COUNT(*) FROM paper_analysis
+                     WHERE student_id = u.id AND created_at > NOW() - INTERVAL '30 days') AS recent_papers,
+                    (SELECT COUNT(*) FROM quiz_attempts
+                     WHERE student_id = u.id AND submitted_at > NOW() - INTERVAL '30 days') AS recent_quizzes,
+                    (SELECT AVG(score::float / total_marks * 100) FROM quiz_attempts
+                     WHERE student_id = u.id AND score IS NOT NULL) AS average_score
+                FROM user_details u
+                LEFT JOIN student_gamification sg ON sg.student_id = u.id
+                WHERE u.id = %s
+            """, (student_id,))
+            student_info = cursor.fetchone()
+        
+        if student_info is None:
+            return None
+        
+        # gamification arrives decoded from JSON (None when the student has no row yet)
+        student_info = dict(student_info)
+        student_info['average_score'] = round(student_info['average_score'], 1) if student_info['average_score'] else 0
+        return student_info
+    
+    # ==================== TEACHER ANALYTICS ====================
+    
+    @_db_op(default=dict, retries=2)
+    def get_class_analytics(self, class_name):
+        """Get comprehensive analytics for a class"""
+        # Known single-row shape, so a plain tuple cursor is unpacked positionally
+        with self._session() as cursor:
+            # Every figure in one round-trip; the two lists come back as JSON arrays
+            cursor.execute("""
+                SELECT
+                    -- Total students
+                    (SELECT COUNT(*) FROM user_details
+                     WHERE role = 'student' AND class = %(class_name)s) AS total_students,
+                    -- Average points and streak
+                    g.avg_points,
+                    g.avg_streak,
+                    -- Paper submissions in last 30 days
+                    (SELECT COUNT(*)
+                     FROM paper_analysis pa
+                     JOIN user_details u ON pa.student_id = u.id
+                     WHERE u.class = %(class_name)s AND pa.created_at > NOW() - INTERVAL '30 days') AS recent_papers,
+                    -- Average quiz performance
+                    (SELECT AVG(qa.score::float / qa.total_marks * 100)
+                     FROM quiz_attempts qa
+                     JOIN user_details u ON qa.student_id = u.id
+                     WHERE u.class = %(class_name)s AND qa.score IS NOT NULL) AS avg_quiz_score,
+                    -- Top performers
+                    (SELECT COALESCE(json_agg(t ORDER BY t.total_points DESC), '[]')
+                     FROM (
+                         SELECT u.full_name, sg.total_points, sg.level, sg.current_streak
+                         FROM student_gamification sg
+                         JOIN user_details u ON sg.student_id = u.id
+                         WHERE u.class = %(class_name)s
+                         ORDER BY sg.total_points DESC
+                         LIMIT 5
+                     ) t) AS top_performers,
+                    -- Subject-wise performance
+                    (SELECT COALESCE(json_agg(sp), '[]')
+                     FROM (
+                         SELECT 
+                             sp.subject,
+                             COUNT(DISTINCT sp.student_id) AS student_count,
+                             SUM(sp.attempts) AS total_attempts,
+                             SUM(sp.correct_attempts) AS correct_attempts,
+                             ROUND(AVG((sp.correct_attempts::numeric / NULLIF(sp.attempts, 0)) * 100), 1) AS avg_accuracy
+                         FROM student_progress sp
+                         JOIN user_details u ON sp.student_id = u.id
+                         WHERE u.class = %(class_name)s
+                         GROUP BY sp.subject
+                     ) sp) AS subject_performance
+                FROM (
+                    SELECT AVG(sg.total_points) AS avg_points, AVG(sg.current_streak) AS avg_streak
+                    FROM student_gamification sg
+                    JOIN user_details u ON sg.student_id = u.id
+                    WHERE u.class = %(class_name)s
+                ) g
+            """, {'class_name': class_name})
+            (total_students, avg_points, avg_streak, recent_papers,
+             avg_quiz_score, top_performers, subject_performance) = cursor.fetchone()
+        
+        return {
+            'total_students': total_students,
+            'avg_points': round(avg_points or 0, 1),
+            'avg_streak': round(avg_streak or 0, 1),
+            'recent_papers': recent_papers,
+            'avg_quiz_score': round(avg_quiz_score or 0, 1),
+            'top_performers': top_performers,
+            'subject_performance': subject_performance,
+        }
+    
+    @_db_op(default=list, retries=2)
+    def get_student_performance_trend(self, student_id, days=30):
+        """Get student performance trend over time (daily average quiz percentage)"""
+        dates, epochs, scores, totals = _load_quiz_scores(self, student_id)
+        
+        # Attempts are sorted by time, so the window is a tail slice
+        start = np.searchsorted(epochs, time.time() - int(days) * 86400, side="right")
+        dates = dates[start:]
+        if not len(dates):
+            return []
+        pct = scores[start:] / totals[start:] * 100
+        
+        # Per-day means: reduce over each run of equal dates
+        day_starts = np.flatnonzero(np.r_[True, dates[1:] != dates[:-1]])
+        sums = np.add.reduceat(pct, day_starts, dtype=np.float64)
+        counts = np.diff(np.r_[day_starts, len(pct)])
+        
+        return [
+            {'date': day.item(), 'avg_score': float(avg)}
+            for day, avg in zip(dates[day_starts], sums / counts)
+        ]
+    
+    # ==================== SEARCH STUDENTS ====================
+    
+    @_db_op(default=list, retries=2)
+    def search_students(self, email=None, class_name=None):
+        with self._session(dict_cursor=True) as cursor:
+            if email:
+                cursor.execute("""
+                    SELECT id, full_name, email, class 
+                    FROM user_details 
+                    WHERE lower(email) = lower(%s) AND role = 'student'
+                """, (email,))
+            elif class_name:
+                cursor.execute("""
+                    SELECT id, full_name, email, class 
+                    FROM user_details 
+                    WHERE class = %s AND role = 'student'
+                """, (class_name,))
+            else:
+                return []
+        
+            results = cursor.fetchall()
+            return [dict(row) for row in results]
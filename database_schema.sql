@@ -1,165 +1,246 @@
--- Table 1: user_details (already exists, but here's the structure for reference)
-CREATE TABLE IF NOT EXISTS user_details (
-    id SERIAL PRIMARY KEY,
-    full_name VARCHAR(255) NOT NULL,
-    email VARCHAR(255) UNIQUE NOT NULL,
-    password_hash VARCHAR(255) NOT NULL,
-    role VARCHAR(50) NOT NULL CHECK (role IN ('teacher', 'student', 'parent')),
-    class VARCHAR(50) NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
-
--- Table 2: curriculum
-CREATE TABLE IF NOT EXISTS curriculum (
-    id SERIAL PRIMARY KEY,
-    class VARCHAR(50) NOT NULL,
-    subject VARCHAR(100) NOT NULL,
-    curriculum TEXT NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE(class, subject)
-);
-
--- Table 3: paper_analysis
-CREATE TABLE IF NOT EXISTS paper_analysis (
-    id SERIAL PRIMARY KEY,
-    class VARCHAR(50) NOT NULL,
-    student_id INTEGER NOT NULL,
-    student_name VARCHAR(255) NOT NULL,
-    subject VARCHAR(100) NOT NULL,
-    student_paper TEXT NOT NULL,
-    analysis_by_model TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (student_id) REFERENCES user_details(id) ON DELETE CASCADE
-);
--- Table 4: student_progress
-CREATE TABLE IF NOT EXISTS student_progress (
-    id SERIAL PRIMARY KEY,
-    student_id INTEGER NOT NULL,
-    class VARCHAR(50) NOT NULL,
-    subject VARCHAR(100) NOT NULL,
-    topic VARCHAR(255) NOT NULL,
-    attempts INTEGER DEFAULT 0,
-    correct_attempts INTEGER DEFAULT 0,
-    last_feedback TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (student_id) REFERENCES user_details(id) ON DELETE CASCADE
-);
-
--- Table 5: learned_topics
-CREATE TABLE IF NOT EXISTS learned_topics (
-    id SERIAL PRIMARY KEY,
-    student_id INTEGER NOT NULL REFERENCES user_details(id) ON DELETE CASCADE,
-    class VARCHAR(50) NOT NULL,
-    subject VARCHAR(100) NOT NULL,
-    topic VARCHAR(255) NOT NULL,
-    learned_content TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE (student_id, subject, topic)
-);
-
--- Table 6: gamification - student points and badges
-CREATE TABLE IF NOT EXISTS student_gamification (
-    id SERIAL PRIMARY KEY,
-    student_id INTEGER NOT NULL REFERENCES user_details(id) ON DELETE CASCADE,
-    total_points INTEGER DEFAULT 0,
-    current_streak INTEGER DEFAULT 0,
-    longest_streak INTEGER DEFAULT 0,
-    last_activity_date DATE,
-    level INTEGER DEFAULT 1,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE(student_id)
-);
-
--- Table 7: badges earned by students
-CREATE TABLE IF NOT EXISTS badges (
-    id SERIAL PRIMARY KEY,
-    student_id INTEGER NOT NULL REFERENCES user_details(id) ON DELETE CASCADE,
-    badge_name VARCHAR(100) NOT NULL,
-    badge_description TEXT,
-    badge_icon VARCHAR(50),
-    earned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
-
--- Table 8: quizzes
-CREATE TABLE IF NOT EXISTS quizzes (
-    id SERIAL PRIMARY KEY,
-    teacher_id INTEGER NOT NULL REFERENCES user_details(id) ON DELETE CASCADE,
-    class VARCHAR(50) NOT NULL,
-    subject VARCHAR(100) NOT NULL,
-    title VARCHAR(255) NOT NULL,
-    duration_minutes INTEGER NOT NULL,
-    total_marks INTEGER NOT NULL,
-    deadline TIMESTAMP,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
-
--- Table 9: quiz questions
-CREATE TABLE IF NOT EXISTS quiz_questions (
-    id SERIAL PRIMARY KEY,
-    quiz_id INTEGER NOT NULL REFERENCES quizzes(id) ON DELETE CASCADE,
-    question_text TEXT NOT NULL,
-    question_type VARCHAR(50) CHECK (question_type IN ('mcq', 'short_answer', 'long_answer')),
-    options JSONB,  -- For MCQ options
-    correct_answer TEXT,
-    marks INTEGER NOT NULL,
-    order_num INTEGER NOT NULL
-);
-
--- Table 10: quiz attempts
-CREATE TABLE IF NOT EXISTS quiz_attempts (
-    id SERIAL PRIMARY KEY,
-    quiz_id INTEGER NOT NULL REFERENCES quizzes(id) ON DELETE CASCADE,
-    student_id INTEGER NOT NULL REFERENCES user_details(id) ON DELETE CASCADE,
-    answers JSONB,
-    score FLOAT,
-    total_marks INTEGER,
-    time_taken INTEGER, -- in seconds
-    submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    evaluated_at TIMESTAMP,
-    feedback TEXT
-);
-
--- Table 11: notifications
-CREATE TABLE IF NOT EXISTS notifications (
-    id SERIAL PRIMARY KEY,
-    user_id INTEGER NOT NULL REFERENCES user_details(id) ON DELETE CASCADE,
-    title VARCHAR(255) NOT NULL,
-    message TEXT NOT NULL,
-    notification_type VARCHAR(50) CHECK (notification_type IN ('quiz', 'deadline', 'achievement', 'general')),
-    is_read BOOLEAN DEFAULT FALSE,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
-
--- Table 12: parent-student relationships
-CREATE TABLE IF NOT EXISTS parent_students (
-    id SERIAL PRIMARY KEY,
-    parent_id INTEGER NOT NULL REFERENCES user_details(id) ON DELETE CASCADE,
-    student_id INTEGER NOT NULL REFERENCES user_details(id) ON DELETE CASCADE,
-    relationship VARCHAR(50) DEFAULT 'parent',
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE(parent_id, student_id)
-);
-
-CREATE TABLE image_embeddings (
-    id SERIAL PRIMARY KEY,
-    file_name TEXT,
-    image_path TEXT,
-    embedding VECTOR(3584)
-);
-ALTER TABLE image_embeddings
-ALTER COLUMN embedding TYPE halfvec(3584) USING embedding::halfvec(3584);
-CREATE INDEX ON image_embeddings USING hnsw (embedding halfvec_cosine_ops);
--- Create indexes for better performance
-CREATE INDEX IF NOT EXISTS idx_curriculum_class_subject ON curriculum(class, subject);
-CREATE INDEX IF NOT EXISTS idx_paper_analysis_student ON paper_analysis(student_id);
-CREATE INDEX IF NOT EXISTS idx_paper_analysis_class ON paper_analysis(class);
-CREATE INDEX IF NOT EXISTS idx_student_progress_student ON student_progress(student_id);
-CREATE INDEX IF NOT EXISTS idx_quiz_attempts_student ON quiz_attempts(student_id);
-CREATE INDEX IF NOT EXISTS idx_quiz_attempts_quiz ON quiz_attempts(quiz_id);
-CREATE INDEX IF NOT EXISTS idx_notifications_user ON notifications(user_id);
-CREATE INDEX IF NOT EXISTS idx_badges_student ON badges(student_id);
-CREATE INDEX IF NOT EXISTS idx_parent_students_parent ON parent_students(parent_id);
-CREATE INDEX IF NOT EXISTS idx_parent_students_student ON parent_students(student_id);
+-- Table 1: user_details (already exists, but here's the structure for reference)
+CREATE TABLE IF NOT EXISTS user_details (
+    id SERIAL PRIMARY KEY,
+    full_name VARCHAR(255) NOT NULL,
+    email VARCHAR(255) UNIQUE NOT NULL,
+    password_hash VARCHAR(255) NOT NULL,
+    role VARCHAR(50) NOT NULL CHECK (role IN ('teacher', 'student', 'parent')),
+    class VARCHAR(50) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Table 2: curriculum
+CREATE TABLE IF NOT EXISTS curriculum (
+    id SERIAL PRIMARY KEY,
+    class VARCHAR(50) NOT NULL,
+    subject VARCHAR(100) NOT NULL,
+    curriculum TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(class, subject)
+);
+
+-- Table 3: paper_analysis
+CREATE TABLE IF NOT EXISTS paper_analysis (
+    id SERIAL PRIMARY KEY,
+    class VARCHAR(50) NOT NULL,
+    student_id INTEGER NOT NULL,
+    student_name VARCHAR(255) NOT NULL,
+    subject VARCHAR(100) NOT NULL,
+    student_paper TEXT NOT NULL,
+    analysis_by_model TEXT,
+    weak_areas JSONB,  -- topics extracted from AREAS FOR IMPROVEMENT at insert time
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (student_id) REFERENCES user_details(id) ON DELETE CASCADE
+);
+-- Table 4: student_progress
+CREATE TABLE IF NOT EXISTS student_progress (
+    id SERIAL PRIMARY KEY,
+    student_id INTEGER NOT NULL,
+    class VARCHAR(50) NOT NULL,
+    subject VARCHAR(100) NOT NULL,
+    topic VARCHAR(255) NOT NULL,
+    attempts INTEGER DEFAULT 0,
+    correct_attempts INTEGER DEFAULT 0,
+    last_feedback TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (student_id) REFERENCES user_details(id) ON DELETE CASCADE
+);
+
+-- Table 5: learned_topics
+CREATE TABLE IF NOT EXISTS learned_topics (
+    id SERIAL PRIMARY KEY,
+    student_id INTEGER NOT NULL REFERENCES user_details(id) ON DELETE CASCADE,
+    class VARCHAR(50) NOT NULL,
+    subject VARCHAR(100) NOT NULL,
+    topic VARCHAR(255) NOT NULL,
+    learned_content TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (student_id, subject, topic)
+);
+
+-- Table 6: gamification - student points and badges
+CREATE TABLE IF NOT EXISTS student_gamification (
+    id SERIAL PRIMARY KEY,
+    student_id INTEGER NOT NULL REFERENCES user_details(id) ON DELETE CASCADE,
+    total_points INTEGER DEFAULT 0,
+    current_streak INTEGER DEFAULT 0,
+    longest_streak INTEGER DEFAULT 0,
+    last_activity_date DATE,
+    level INTEGER DEFAULT 1,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(student_id)
+);
+
+-- Table 7: badges earned by students
+CREATE TABLE IF NOT EXISTS badges (
+    id SERIAL PRIMARY KEY,
+    student_id INTEGER NOT NULL REFERENCES user_details(id) ON DELETE CASCADE,
+    badge_name VARCHAR(100) NOT NULL,
+    badge_description TEXT,
+    badge_icon VARCHAR(50),
+    earned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Table 8: quizzes
+CREATE TABLE IF NOT EXISTS quizzes (
+    id SERIAL PRIMARY KEY,
+    teacher_id INTEGER NOT NULL REFERENCES user_details(id) ON DELETE CASCADE,
+    class VARCHAR(50) NOT NULL,
+    subject VARCHAR(100) NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    duration_minutes INTEGER NOT NULL,
+    total_marks INTEGER NOT NULL,
+    deadline TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Table 9: quiz questions
+CREATE TABLE IF NOT EXISTS quiz_questions (
+    id SERIAL PRIMARY KEY,
+    quiz_id INTEGER NOT NULL REFERENCES quizzes(id) ON DELETE CASCADE,
+    question_text TEXT NOT NULL,
+    question_type VARCHAR(50) CHECK (question_type IN ('mcq', 'short_answer', 'long_answer')),
+    options JSONB,  -- For MCQ options
+    correct_answer TEXT,
+    marks INTEGER NOT NULL,
+    order_num INTEGER NOT NULL
+);
+
+-- Table 10: quiz attempts
+CREATE TABLE IF NOT EXISTS quiz_attempts (
+    id SERIAL PRIMARY KEY,
+    quiz_id INTEGER NOT NULL REFERENCES quizzes(id) ON DELETE CASCADE,
+    student_id INTEGER NOT NULL REFERENCES user_details(id) ON DELETE CASCADE,
+    answers JSONB,
+    score FLOAT,
+    total_marks INTEGER,
+    time_taken INTEGER, -- in seconds
+    submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    evaluated_at TIMESTAMP,
+    feedback TEXT
+);
+
+-- Table 11: notifications
+CREATE TABLE IF NOT EXISTS notifications (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES user_details(id) ON DELETE CASCADE,
+    title VARCHAR(255) NOT NULL,
+    message TEXT NOT NULL,
+    notification_type VARCHAR(50) CHECK (notification_type IN ('quiz', 'deadline', 'achievement', 'general')),
+    is_read BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Table 12: parent-student relationships
+CREATE TABLE IF NOT EXISTS parent_students (
+    id SERIAL PRIMARY KEY,
+    parent_id INTEGER NOT NULL REFERENCES user_details(id) ON DELETE CASCADE,
+    student_id INTEGER NOT NULL REFERENCES user_details(id) ON DELETE CASCADE,
+    relationship VARCHAR(50) DEFAULT 'parent',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(parent_id, student_id)
+);
+
+CREATE TABLE image_embeddings (
+    id SERIAL PRIMARY KEY,
+    file_name TEXT,
+    image_path TEXT,
+    embedding VECTOR(3584)
+);
+ALTER TABLE image_embeddings
+ALTER COLUMN embedding TYPE halfvec(3584) USING embedding::halfvec(3584);
+CREATE INDEX ON image_embeddings USING hnsw (embedding halfvec_cosine_ops);
+-- Create indexes for better performance
+CREATE INDEX IF NOT EXISTS idx_curriculum_class_subject ON curriculum(class, subject);
+CREATE INDEX IF NOT EXISTS idx_paper_analysis_student ON paper_analysis(student_id);
+CREATE INDEX IF NOT EXISTS idx_paper_analysis_class ON paper_analysis(class);
+CREATE INDEX IF NOT EXISTS idx_student_progress_student ON student_progress(student_id);
+CREATE INDEX IF NOT EXISTS idx_quiz_attempts_student ON quiz_attempts(student_id);
+CREATE INDEX IF NOT EXISTS idx_quiz_attempts_quiz ON quiz_attempts(quiz_id);
+CREATE INDEX IF NOT EXISTS idx_notifications_user ON notifications(user_id);
+CREATE INDEX IF NOT EXISTS idx_badges_student ON badges(student_id);
+CREATE INDEX IF NOT EXISTS idx_parent_students_parent ON parent_students(parent_id);
+CREATE INDEX IF NOT EXISTS idx_parent_students_student ON parent_students(student_id);
+
+-- Migration: weak areas extracted at insert time (existing rows: Database().backfill_weak_areas())
+ALTER TABLE paper_analysis ADD COLUMN IF NOT EXISTS weak_areas JSONB;
+
+-- Migration: one progress row per student/subject/topic (save_practice_result upserts on it;
+-- merge any duplicate rows before creating the index)
+CREATE UNIQUE INDEX IF NOT EXISTS ux_student_progress_key ON student_progress(student_id, subject, topic);
+
+-- Migration: add_points credits points and advances the streak in a single statement
+CREATE OR REPLACE FUNCTION award_points(sid INTEGER, pts INTEGER)
+RETURNS TABLE(new_total INTEGER, new_streak INTEGER, new_level INTEGER) AS $$
+BEGIN
+    RETURN QUERY
+    WITH updated AS (
+        UPDATE student_gamification g
+        SET total_points = g.total_points + pts,
+            current_streak = CASE
+                WHEN g.last_activity_date = CURRENT_DATE - 1 THEN g.current_streak + 1
+                WHEN g.last_activity_date IS NULL OR g.last_activity_date < CURRENT_DATE - 1 THEN 1
+                ELSE g.current_streak
+            END,
+            longest_streak = GREATEST(g.longest_streak, CASE
+                WHEN g.last_activity_date = CURRENT_DATE - 1 THEN g.current_streak + 1
+                WHEN g.last_activity_date IS NULL OR g.last_activity_date < CURRENT_DATE - 1 THEN 1
+                ELSE g.current_streak
+            END),
+            last_activity_date = CURRENT_DATE,
+            level = (g.total_points + pts) / 100 + 1,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE g.student_id = sid
+        RETURNING g.total_points, g.current_streak, g.level
+    )
+    SELECT * FROM updated;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Migration: newest-first pages of analysis history and practice progress
+CREATE INDEX IF NOT EXISTS ix_paper_analysis_student_created ON paper_analysis(student_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_student_progress_student_updated ON student_progress(student_id, updated_at DESC);
+
+-- Migration: performance indexes for the remaining dashboard lookups. CONCURRENTLY cannot
+-- run inside a transaction block, so run these statements on their own (e.g. psql autocommit).
+-- Email lookups are case-insensitive; resolve any case-only duplicate emails first.
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ux_user_email_lower ON user_details(lower(email));
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_learned_topics_student_class_created ON learned_topics(student_id, class, created_at DESC);
+
+-- Migration: curriculum listing for teacher dashboards, without the curriculum text.
+-- Refreshed by the app after every curriculum write (the unique index allows CONCURRENTLY).
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_curricula_summary AS
+    SELECT class, subject, updated_at FROM curriculum
+WITH DATA;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_curricula_summary ON mv_curricula_summary(class, subject);
+
+-- Migration: quiz score trend per student (range probe on submitted_at, scores read from the index)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_quiz_attempts_student_submitted
+    ON quiz_attempts(student_id, submitted_at) INCLUDE (score, total_marks);
+
+-- Migration: composite indexes for the badge, notification, quiz and roster lookups
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_badges_student_name ON badges(student_id, badge_name);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_quiz_questions_quiz_order ON quiz_questions(quiz_id, order_num);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_role_class ON user_details(role, class);
+
+-- Migration: unit-length image embeddings. Only rows that are not already unit length are
+-- rewritten, so re-running this file does not touch the table; search re-ranks by cosine
+-- distance, so rows loaded later without normalizing still rank correctly.
+UPDATE image_embeddings SET embedding = l2_normalize(embedding)
+WHERE embedding IS NOT NULL AND abs(l2_norm(embedding) - 1) > 1e-3;
+DROP INDEX CONCURRENTLY IF EXISTS image_embeddings_embedding_idx;
+
+-- Migration: binary-quantized first stage for image search (Hamming distance over sign bits),
+-- re-ranked with the full halfvec. The expression must match the one in image_utils.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_image_embeddings_embedding_bit
+    ON image_embeddings USING hnsw ((binary_quantize(embedding)::bit(3584)) bit_hamming_ops);
+-- Re-ranking runs over the candidate subquery only, so no full-precision index is used
+DROP INDEX CONCURRENTLY IF EXISTS ix_image_embeddings_embedding_ip;
+
+-- Migration: notification pages are keyed on id alone (newest first, next page id < last id),
+-- so the unread lookup index ends in id rather than created_at
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_notif_user_unread_id ON notifications(user_id, is_read, id DESC);
+DROP INDEX CONCURRENTLY IF EXISTS idx_notif_user_unread;
@@ -0,0 +1,30 @@
+import functools
+import re
+
+# Answer feedback: every negative and positive keyword in one alternation, one scan
+_RE_FEEDBACK_KEYWORD = re.compile(
+    r'\b(?:(?P<negative>incorrect|wrong|not correct|not right)'
+    r'|(?P<positive>^correct|right|well done|excellent|perfect|great job))\b'
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def classify_feedback(feedback):
+    """Whether tutor feedback marks an answer correct (used by the evaluator and the database)"""
+    feedback_lower = feedback.strip().lower()
+    
+    # Check for explicit markers at the beginning
+    if feedback_lower.startswith("correct"):
+        return True
+    if feedback_lower.startswith(("partially", "incorrect", "wrong")):
+        return False
+    
+    # Fallback with word boundaries, in a single pass. Any negative indicator wins
+    # (avoids false positives); otherwise a positive one is needed, and if unclear,
+    # default to incorrect
+    is_correct = False
+    for keyword in _RE_FEEDBACK_KEYWORD.finditer(feedback_lower):
+        if keyword.lastgroup == 'negative':
+            return False
+        is_correct = True
+    return is_correct
@@ -1,31 +1,59 @@
 import os
+import math
+import base64
+import functools
 import requests
 import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import numpy as np
 from typing import List, Dict, Optional
-import streamlit as st
-from config import BASE_URL
+from psycopg2.extras import RealDictCursor
+from config import BASE_URL, HNSW_EF_SEARCH
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+try:  # optional: JIT-compiled cosine kernel for tight scoring loops
+    from numba import njit
+except ImportError:
+    njit = None
+
 # ============================================================
 # CONFIGURATION
 # ============================================================
-BASE_URL = st.secrets.get("BASE_URL")
 DEFAULT_TIMEOUT = 200
+EMBEDDING_BATCH_SIZE = 64
+
+# Shared HTTP session so embedding calls reuse pooled keep-alive connections
+# instead of a fresh TCP+TLS handshake per request
+_SESSION = requests.Session()
+_SESSION.verify = False
+_SESSION.headers["Content-Type"] = "application/json"
+# Retries cover refused connections and gateway errors only. A read timeout is never
+# retried (the embedding POST may already be running, and DEFAULT_TIMEOUT is long);
+# read=False re-raises it as-is, so callers still see requests.exceptions.Timeout
+_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=3, read=False, backoff_factor=0.2, allowed_methods=None, status_forcelist=(502, 503, 504)
+    )
+)
+_SESSION.mount("https://", _adapter)
+_SESSION.mount("http://", _adapter)
 
 # ============================================================
 # TEXT EMBEDDING API
 # ============================================================
-def get_text_embedding(text: str, timeout: int = DEFAULT_TIMEOUT) -> Optional[List[float]]:
+def _request_text_embedding(text: str, timeout: int = DEFAULT_TIMEOUT) -> Optional[np.ndarray]:
     """
-    Get text embedding from Modal API
+    Get text embedding from Modal API (uncached)
     
     Args:
         text: Input text to embed
         timeout: Request timeout in seconds
     
     Returns:
-        List of embedding values or None if failed
+        float32 embedding vector or None if failed
     """
     try:
         endpoint = f"{BASE_URL}/get_text_embedding"
@@ -33,13 +61,16 @@ def get_text_embedding(text: str, timeout: int = DEFAULT_TIMEOUT) -> Optional[Li
         
         print(f"📡 Requesting embedding for: '{text[:50]}...'")
         
-        response = requests.post(endpoint, json=payload, timeout=timeout, verify=False)
+        response = _SESSION.post(endpoint, json=payload, timeout=timeout)
         
         if response.status_code == 200:
             data = response.json()
-            embeddings = data.get("embeddings")
+            if data.get("embeddings_b64"):
+                embeddings = np.frombuffer(base64.b64decode(data["embeddings_b64"]), dtype=np.float32)
+            else:
+                embeddings = np.asarray(data.get("embeddings") or [], dtype=np.float32)
             
-            if embeddings:
+            if embeddings.size:
                 print(f"✅ Received embedding (dimension: {len(embeddings)})")
                 return embeddings
             else:
@@ -59,9 +90,105 @@ def get_text_embedding(text: str, timeout: int = DEFAULT_TIMEOUT) -> Optional[Li
         return None
 
 
+@functools.lru_cache(maxsize=4096)
+def _cached_embedding(text: str, timeout: int) -> np.ndarray:
+    """Memoized embedding lookup; raises on failure so failed requests are not cached"""
+    embedding = _request_text_embedding(text, timeout)
+    if embedding is None:
+        raise LookupError("no embedding returned")
+    embedding.flags.writeable = False  # shared between callers
+    return embedding
+
+
+def get_text_embedding(text: str, timeout: int = DEFAULT_TIMEOUT) -> Optional[np.ndarray]:
+    """
+    Get text embedding, reusing the result for texts already embedded in this process
+    
+    Args:
+        text: Input text to embed
+        timeout: Request timeout in seconds
+    
+    Returns:
+        Read-only float32 embedding vector or None if failed
+    """
+    try:
+        return _cached_embedding(text, timeout)
+    except LookupError:
+        return None
+
+
+def _readonly_embedding(values) -> np.ndarray:
+    """float32 array marked read-only, the same kind get_text_embedding hands out"""
+    embedding = np.asarray(values, dtype=np.float32)
+    embedding.flags.writeable = False
+    return embedding
+
+
+def _request_text_embeddings(texts: List[str], timeout: int) -> List[Optional[np.ndarray]]:
+    """One batch-endpoint request, falling back to per-text requests on failure"""
+    try:
+        endpoint = f"{BASE_URL}/get_text_embeddings_batch"
+        response = _SESSION.post(endpoint, json={"query_texts": texts}, timeout=timeout)
+        
+        if response.status_code == 200:
+            embeddings = response.json().get("embeddings")
+            if embeddings and len(embeddings) == len(texts):
+                print(f"✅ Received {len(embeddings)} embeddings in one request")
+                return [_readonly_embedding(e) if e else None for e in embeddings]
+        
+        print(f"⚠️ Batch embedding request failed [{response.status_code}], embedding one by one")
+    except Exception as e:
+        print(f"⚠️ Batch embedding request failed ({e}), embedding one by one")
+    
+    return [get_text_embedding(text, timeout) for text in texts]
+
+
 # ============================================================
 # IMAGE SIMILARITY SEARCH
 # ============================================================
+# Candidates taken from the binary-quantized first stage before exact re-ranking
+IMAGE_RERANK_CANDIDATES = 200
+
+# Two-stage search. Stage 1 walks the HNSW index on binary_quantize(embedding)
+# (one sign bit per dimension, Hamming distance <~>) for $4 candidates; stage 2
+# re-ranks only those with the full halfvec by cosine distance (<=>). Sign bits do
+# not depend on vector length, and over a few hundred rows <=> costs no more than
+# the inner product, so a stored row that is not unit length still ranks correctly;
+# min_similarity is a distance bound on the re-rank.
+# Prepared once per pooled connection (tracked in conn.prepared, as in database.py)
+_SIMILAR_IMAGES_SQL = """
+    PREPARE similar_images(halfvec, float8, int, int) AS
+    SELECT 
+        id,
+        file_name,
+        image_path,
+        round((1 - (embedding <=> $1))::numeric, 4)::float8 AS similarity_score
+    FROM (
+        SELECT id, file_name, image_path, embedding
+        FROM image_embeddings
+        WHERE embedding IS NOT NULL
+        ORDER BY binary_quantize(embedding)::bit(3584) <~> binary_quantize($1)
+        LIMIT $4
+    ) AS candidates
+    WHERE embedding <=> $1 <= $2
+    ORDER BY embedding <=> $1
+    LIMIT $3
+"""
+
+
+@functools.lru_cache(maxsize=512)
+def _embed_query(search_query: str) -> str:
+    """pgvector literal for a search query's unit-length embedding, memoized (raises LookupError on failure)"""
+    text_embedding = get_text_embedding(search_query)
+    if text_embedding is None:
+        raise LookupError("no embedding returned")
+    norm = np.sqrt(np.vdot(text_embedding, text_embedding))
+    if norm == 0:
+        raise LookupError("zero embedding returned")
+    # Unit length, like the stored rows; the re-rank itself does not depend on it
+    return "[" + ",".join(map(str, text_embedding / norm)) + "]"
+
+
 def get_similar_images(
     db, 
     topic: str, 
@@ -82,6 +209,7 @@ def get_similar_images(
     Returns:
         List of dicts with image_path, file_name, and similarity_score
     """
+    conn = None
     try:
         # Create search query combining topic and subject
         if subject:
@@ -91,57 +219,32 @@ def get_similar_images(
         
         print(f"🔍 Searching images for: '{search_query}'")
         
-        # Get text embedding for the topic
-        text_embedding = get_text_embedding(search_query)
-        
-        if not text_embedding:
+        # Get text embedding for the topic, already serialized for pgvector
+        try:
+            embedding_str = _embed_query(search_query)
+        except LookupError:
             print("❌ Failed to get text embedding")
             return []
         
-        # Query database for similar images using cosine similarity
-        conn = db.connect()
-        if not conn:
-            print("❌ Database connection failed")
-            return []
-        
-        cursor = conn.cursor()
-        
-        # Convert embedding to PostgreSQL array format
-        embedding_str = "[" + ",".join(map(str, text_embedding)) + "]"
-        
-        # Use cosine similarity: 1 - (embedding <=> query_embedding)
-        # <=> is the cosine distance operator in pgvector
-        query = """
-            SELECT 
-                id,
-                file_name,
-                image_path,
-                1 - (embedding <=> %s::vector) AS similarity_score
-            FROM image_embeddings
-            WHERE embedding IS NOT NULL
-            ORDER BY embedding <=> %s::vector
-            LIMIT %s
-        """
+        # Query database for similar images on a warm connection from the app's shared pool
+        conn = db.pool.getconn()
         
-        cursor.execute(query, (embedding_str, embedding_str, top_k))
-        results = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
-        
-        # Format results
-        similar_images = []
-        for row in results:
-            similarity = float(row[3])
+        # Rows come back as dicts ready to return: id, file_name, image_path, similarity_score
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            # Candidate list size for the HNSW scan (recall vs speed); must cover the
+            # first-stage LIMIT. SET LOCAL lasts until the transaction ends, which putconn() rolls back
+            candidates = max(IMAGE_RERANK_CANDIDATES, top_k)
+            cursor.execute("SET LOCAL hnsw.ef_search = %s", (max(HNSW_EF_SEARCH, candidates),))
+            
+            if "similar_images" not in conn.prepared:
+                cursor.execute(_SIMILAR_IMAGES_SQL)
+                conn.prepared.add("similar_images")
             
-            # Filter by minimum similarity threshold
-            if similarity >= min_similarity:
-                similar_images.append({
-                    'id': row[0],
-                    'file_name': row[1],
-                    'image_path': row[2],
-                    'similarity_score': round(similarity, 4)
-                })
+            # The vector literal is sent once and parsed once, then used by every $1 reference
+            cursor.execute(
+                "EXECUTE similar_images(%s, %s, %s, %s)", (embedding_str, 1 - min_similarity, top_k, candidates)
+            )
+            similar_images = cursor.fetchall()
         
         print(f"✅ Found {len(similar_images)} similar images (min similarity: {min_similarity})")
         for img in similar_images:
@@ -154,34 +257,60 @@ def get_similar_images(
         import traceback
         traceback.print_exc()
         return []
+    finally:
+        if conn:
+            db.pool.putconn(conn)
 
 
 # ============================================================
 # UTILITY FUNCTIONS
 # ============================================================
-def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _cosine_numba(a, b):
+        dot = 0.0
+        norm_a = 0.0
+        norm_b = 0.0
+        for i in range(a.shape[0]):
+            dot += a[i] * b[i]
+            norm_a += a[i] * a[i]
+            norm_b += b[i] * b[i]
+        if norm_a == 0.0 or norm_b == 0.0:
+            return 0.0
+        return dot / math.sqrt(norm_a * norm_b)
+    
+    # Pay the compile cost once at import rather than on the first real call
+    _cosine_numba(np.ones(2, dtype=np.float32), np.ones(2, dtype=np.float32))
+else:
+    _cosine_numba = None
+
+
+def cosine_similarity(vec1, vec2) -> float:
     """
     Calculate cosine similarity between two vectors
     
     Args:
-        vec1: First vector
-        vec2: Second vector
+        vec1: First vector (list or ndarray)
+        vec2: Second vector (list or ndarray)
     
     Returns:
         Similarity score between -1 and 1
     """
     try:
-        v1 = np.array(vec1)
-        v2 = np.array(vec2)
+        v1 = np.asarray(vec1, dtype=np.float32)
+        v2 = np.asarray(vec2, dtype=np.float32)
+        
+        # The JIT loop does no bounds checks, so only matching 1-D vectors go to it
+        if _cosine_numba is not None and v1.ndim == 1 and v1.shape == v2.shape:
+            return float(_cosine_numba(v1, v2))
         
-        dot_product = np.dot(v1, v2)
-        norm1 = np.linalg.norm(v1)
-        norm2 = np.linalg.norm(v2)
+        # Squared norms via vdot (straight to BLAS), then a single sqrt
+        norms = np.vdot(v1, v1) * np.vdot(v2, v2)
         
-        if norm1 == 0 or norm2 == 0:
+        if norms == 0:
             return 0.0
         
-        return float(dot_product / (norm1 * norm2))
+        return float(np.dot(v1, v2) / np.sqrt(norms))
     
     except Exception as e:
         print(f"❌ Error calculating cosine similarity: {e}")
@@ -198,9 +327,9 @@ def validate_image_path(image_path: str) -> bool:
     Returns:
         True if valid, False otherwise
     """
-    import os
     try:
-        return os.path.exists(image_path) and os.path.isfile(image_path)
+        # isfile() is False for missing paths too, so one stat() answers both
+        return os.path.isfile(image_path)
     except Exception:
         return False
 
@@ -208,21 +337,26 @@ def validate_image_path(image_path: str) -> bool:
 # ============================================================
 # BATCH PROCESSING (Optional - for future use)
 # ============================================================
-def get_text_embeddings_batch(texts: List[str], timeout: int = 120) -> List[Optional[List[float]]]:
+def get_text_embeddings_batch(
+    texts: List[str],
+    timeout: int = 120,
+    batch_size: int = EMBEDDING_BATCH_SIZE
+) -> List[Optional[np.ndarray]]:
     """
-    Get embeddings for multiple texts (if API supports batch)
+    Get embeddings for multiple texts, one request to the batch endpoint per batch_size texts
+    
+    A batch whose request fails falls back to one get_text_embedding call per text.
     
     Args:
         texts: List of texts to embed
-        timeout: Request timeout in seconds
+        timeout: Request timeout in seconds (per request)
+        batch_size: Maximum texts per request, keeps payloads under the API's limits
     
     Returns:
-        List of embeddings (None for failed requests)
+        List of read-only float32 embeddings, aligned with texts (None for failed texts)
     """
+    texts = list(texts)
     embeddings = []
-    
-    for text in texts:
-        embedding = get_text_embedding(text, timeout)
-        embeddings.append(embedding)
-    
+    for start in range(0, len(texts), batch_size):
+        embeddings.extend(_request_text_embeddings(texts[start:start + batch_size], timeout))
     return embeddings